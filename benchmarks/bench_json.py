@@ -0,0 +1,76 @@
+"""
+Compare the JSON codecs a Session can use on typical payloads: a large record listing (as returned for get_all), a job
+with long logs, and the serialize() output of a record.
+
+    python benchmarks/bench_json.py
+    python benchmarks/bench_json.py --records 100000 --repeat 5
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from omics_dashboard_client.json_codec import JsonCodec, OrjsonCodec, orjson  # noqa: E402
+
+
+def listing(count):
+    return [{
+        'id': i, 'created_on': '2019-01-01T00:00:00', 'updated_on': '2019-01-01T00:00:00',
+        'name': 'sample {}'.format(i), 'description': 'A synthetic record.', 'creator_id': 1, 'owner_id': 1,
+        'last_editor_id': 1, 'group_can_read': True, 'group_can_write': True, 'all_can_read': True,
+        'all_can_write': False, 'user_group_id': 1, 'is_write_permitted': True, 'filename': '{}.h5'.format(i),
+        'file_type': 'hdf5', 'file_info': {'Y': [500, 1000], 'x': [1, 1000]}, 'sample_group_ids': [1, 2]
+    } for i in range(1, count + 1)]
+
+
+def job(log_lines):
+    return {
+        'id': '00000000-0000-0000-0000-000000000000', 'owner_id': 1, 'user_group_id': 1, 'type': 'Workflow',
+        'submission': '2019-01-01T00:00:00', 'start': '2019-01-01T00:00:01', 'end': '2019-01-01T00:10:00',
+        'status': 'Succeeded',
+        'logs': {'stdout': '\n'.join('step {} finished in 0.25 s'.format(i) for i in range(log_lines)),
+                 'stderr': ''}
+    }
+
+
+def measure(operation, repeat, number):
+    # the fastest of repeat runs of number calls, per call
+    best = None
+    for _ in range(repeat):
+        start = time.time()
+        for _ in range(number):
+            operation()
+        elapsed = (time.time() - start) / number
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, default=50000, help='The number of records in the listing.')
+    parser.add_argument('--log-lines', type=int, default=200000, help='The number of lines in the job logs.')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement. The fastest is reported.')
+    args = parser.parse_args()
+
+    codecs = [JsonCodec()]
+    if orjson is not None:
+        codecs.append(OrjsonCodec())
+    else:
+        print('orjson is not installed, only the json module is measured.')
+    payloads = [('listing', listing(args.records)), ('job logs', job(args.log_lines)),
+                ('record', listing(1)[0])]
+
+    print('{:<10} {:<8} {:>12} {:>12}'.format('payload', 'codec', 'decode ms', 'encode ms'))
+    for name, payload in payloads:
+        encoded = JsonCodec().dumps(payload)
+        number = 1 if len(encoded) > 65536 else 1000
+        for codec in codecs:
+            decode = measure(lambda: codec.loads(encoded), args.repeat, number)
+            encode = measure(lambda: codec.dumps(payload), args.repeat, number)
+            print('{:<10} {:<8} {:>12.3f} {:>12.3f}'.format(name, codec.name, decode * 1000, encode * 1000))
+
+
+if __name__ == '__main__':
+    main()
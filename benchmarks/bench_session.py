@@ -0,0 +1,162 @@
+"""
+Throughput benchmarks of Session against an in-memory FakeOmicsDashboard, so performance regressions can be caught
+without a server.
+
+    python benchmarks/bench_session.py                              # run everything and print a table
+    python benchmarks/bench_session.py get_all_10k download_files   # run some benchmarks
+    python benchmarks/bench_session.py --save baseline.json
+    python benchmarks/bench_session.py --compare baseline.json --tolerance 0.25
+
+With --compare, the exit status is 1 if a benchmark got slower than the baseline by more than the tolerance.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from omics_dashboard_client import Collection, ScratchSpace  # noqa: E402
+from omics_dashboard_client.fake_server import FakeOmicsDashboard  # noqa: E402
+
+
+def bench_get_all(count, lite=False):
+    def run():
+        session = FakeOmicsDashboard(records={'collections': count}).session()
+        start = time.time()
+        records = session.get_all(Collection, lite=lite)
+        assert len(records) == count
+        return time.time() - start, count, 'records'
+    return run
+
+
+def bench_get_all_frame(count):
+    def run():
+        session = FakeOmicsDashboard(records={'collections': count}).session()
+        start = time.time()
+        assert len(session.get_all_frame(Collection)) == count
+        return time.time() - start, count, 'records'
+    return run
+
+
+def bench_iter_all(count, page_size=None):
+    def run():
+        session = FakeOmicsDashboard(records={'collections': count}).session()
+        start = time.time()
+        assert sum(1 for _ in session.iter_all(Collection, page_size=page_size)) == count
+        return time.time() - start, count, 'records'
+    return run
+
+
+def bench_download_files(count, file_size, max_workers):
+    def run():
+        server = FakeOmicsDashboard(records={'collections': count}, file_size=file_size)
+        directory = tempfile.mkdtemp()
+        try:
+            with ScratchSpace(directory) as scratch:
+                session = server.session(scratch_space=scratch)
+                records = session.get_all(Collection)
+                start = time.time()
+                report = session.download_files(records, max_workers=max_workers)
+                elapsed = time.time() - start
+                report.raise_for_errors()
+                return elapsed, report.total_size / 1048576.0, 'MiB'
+        finally:
+            shutil.rmtree(directory)
+    return run
+
+
+def bench_upload(count, file_size):
+    def run():
+        server = FakeOmicsDashboard(records={'collections': count}, file_size=file_size)
+        directory = tempfile.mkdtemp()
+        try:
+            with ScratchSpace(directory) as scratch:
+                session = server.session(scratch_space=scratch)
+                records = [session.get(Collection, record_id, download_file=True)
+                           for record_id in range(1, count + 1)]
+                start = time.time()
+                for record in records:
+                    session.update(record, upload_file=True)
+                elapsed = time.time() - start
+                return elapsed, count * os.path.getsize(records[0].local_filename) / 1048576.0, 'MiB'
+        finally:
+            shutil.rmtree(directory)
+    return run
+
+
+def bench_job_polling(count, batch_threshold):
+    def run():
+        # the jobs finish at once, so only the time the client needs to poll and decode them is measured
+        session = FakeOmicsDashboard(job_duration=0.0).session()
+        jobs = [session.submit_job({'class': 'Workflow'}, {'index': i}) for i in range(count)]
+        start = time.time()
+        assert sum(1 for _ in session.wait_for_jobs(jobs, batch_threshold=batch_threshold)) == count
+        return time.time() - start, count, 'jobs'
+    return run
+
+
+BENCHMARKS = [
+    ('get_all_10k', bench_get_all(10000)),
+    ('get_all_100k', bench_get_all(100000)),
+    ('get_all_lite_100k', bench_get_all(100000, lite=True)),
+    ('get_all_frame_100k', bench_get_all_frame(100000)),
+    ('iter_all_100k', bench_iter_all(100000)),
+    ('iter_all_100k_paged', bench_iter_all(100000, page_size=5000)),
+    ('download_files', bench_download_files(50, 4 * 1048576, 4)),
+    ('upload', bench_upload(20, 4 * 1048576)),
+    ('job_polling', bench_job_polling(200, 201)),
+    ('job_polling_batched', bench_job_polling(2000, 4)),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('benchmarks', nargs='*', help='The benchmarks to run (default: all).')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per benchmark. The fastest is reported.')
+    parser.add_argument('--save', help='Write the results to this JSON file.')
+    parser.add_argument('--compare', help='Compare the results with a JSON file written by --save.')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='How much slower (as a fraction) a benchmark may get before --compare fails.')
+    args = parser.parse_args()
+
+    names = [name for name, _ in BENCHMARKS]
+    for name in args.benchmarks:
+        if name not in names:
+            parser.error('Unknown benchmark {}. Choose from {}.'.format(name, ', '.join(names)))
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as fp:
+            baseline = json.load(fp)
+
+    results = {}
+    regressions = []
+    print('{:<22} {:>10} {:>16}  {}'.format('benchmark', 'seconds', 'throughput', 'baseline'))
+    for name, benchmark in BENCHMARKS:
+        if args.benchmarks and name not in args.benchmarks:
+            continue
+        elapsed, amount, unit = min(benchmark() for _ in range(args.repeat))
+        results[name] = {'seconds': elapsed, 'amount': amount, 'unit': unit}
+        throughput = '{:.1f} {}/s'.format(amount / elapsed, unit) if elapsed > 0 else '-'
+        comparison = ''
+        if name in baseline:
+            change = elapsed / baseline[name]['seconds'] - 1 if baseline[name]['seconds'] > 0 else 0.0
+            comparison = '{:+.0%}'.format(change)
+            if change > args.tolerance:
+                comparison += ' REGRESSION'
+                regressions.append(name)
+        print('{:<22} {:>10.3f} {:>16}  {}'.format(name, elapsed, throughput, comparison))
+
+    if args.save:
+        with open(args.save, 'w') as fp:
+            json.dump(results, fp, indent=2)
+    if regressions:
+        print('Slower than the baseline: {}'.format(', '.join(regressions)))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
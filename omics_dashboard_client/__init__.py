@@ -1,8 +1,20 @@
+import sys
+
 import omics_dashboard_client.hdf_tools as hdf_tools
+from omics_dashboard_client.analysis_bundle import AnalysisBundle
+from omics_dashboard_client.download_cache import DownloadCache
+from omics_dashboard_client.identity_map import IdentityMap
+from omics_dashboard_client.instrumentation import RequestStats
+from omics_dashboard_client.json_codec import JsonCodec, OrjsonCodec
+from omics_dashboard_client.metadata_cache import MetadataCache
+from omics_dashboard_client.retry import RetryPolicy, CircuitBreaker, CircuitOpenError
+from omics_dashboard_client.scratch_space import ScratchSpace, ScratchSpaceFullError
 from omics_dashboard_client.record.analysis import Analysis
 from omics_dashboard_client.record.collection import Collection
 from omics_dashboard_client.record.external_file import ExternalFile
 from omics_dashboard_client.record.job import Job
+from omics_dashboard_client.record.lite_record import LiteRecord, LiteAnalysis, LiteCollection, LiteExternalFile, \
+    LiteJob, LiteSample, LiteSampleGroup, LiteUser, LiteUserGroup, LiteWorkflow, LiteWorkflowModule
 from omics_dashboard_client.record.sample import Sample
 from omics_dashboard_client.record.sample_group import SampleGroup
 from omics_dashboard_client.record.user import User
@@ -10,3 +22,6 @@ from omics_dashboard_client.record.user_group import UserGroup
 from omics_dashboard_client.record.workflow import Workflow
 from omics_dashboard_client.record.workflow_module import WorkflowModule
 from omics_dashboard_client.session import Session
+
+if sys.version_info >= (3, 5):
+    from omics_dashboard_client.async_session import AsyncSession
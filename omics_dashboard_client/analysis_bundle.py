@@ -0,0 +1,80 @@
+from typing import List
+
+from omics_dashboard_client.batch import BatchReport
+from omics_dashboard_client.record.analysis import Analysis
+from omics_dashboard_client.record.collection import Collection
+from omics_dashboard_client.record.external_file import ExternalFile
+from omics_dashboard_client.record.workflow import Workflow
+
+
+class AnalysisBundle(object):
+    """
+    An analysis together with the records it links to, as returned by Session.fetch_analysis_bundle.
+    """
+
+    def __init__(self, analysis, collections, workflows, external_files, report):
+        # type: (Analysis, List[Collection], List[Workflow], List[ExternalFile], BatchReport) -> None
+        """
+        :param analysis:
+        :param collections: The collections of the analysis which could be fetched, in the order of collection_ids.
+        :param workflows: The workflows of the analysis which could be fetched, in the order of workflow_ids.
+        :param external_files: The external files of the analysis which could be fetched, in the order of
+                               external_file_ids.
+        :param report: One result per linked record. The key of a result is the record type and id.
+        """
+        self._analysis = analysis
+        self._collections = collections
+        self._workflows = workflows
+        self._external_files = external_files
+        self._report = report
+
+    def __repr__(self):
+        return '<AnalysisBundle {}: {} collections, {} workflows, {} external files, {} failed>'.format(
+            self._analysis.id, len(self._collections), len(self._workflows), len(self._external_files),
+            len(self._report.failed))
+
+    @property
+    def analysis(self):
+        # type: () -> Analysis
+        return self._analysis
+
+    @property
+    def collections(self):
+        # type: () -> List[Collection]
+        return self._collections
+
+    @property
+    def workflows(self):
+        # type: () -> List[Workflow]
+        return self._workflows
+
+    @property
+    def external_files(self):
+        # type: () -> List[ExternalFile]
+        return self._external_files
+
+    @property
+    def report(self):
+        # type: () -> BatchReport
+        """
+        The outcome of fetching each linked record (and downloading its file), with the elapsed time and the number of
+        bytes downloaded.
+        :return:
+        """
+        return self._report
+
+    @property
+    def complete(self):
+        # type: () -> bool
+        """
+        Whether every linked record was fetched.
+        :return:
+        """
+        return not self._report.failed
+
+    def raise_for_errors(self):
+        """
+        Raise the error of the first linked record which could not be fetched, if any.
+        :return:
+        """
+        self._report.raise_for_errors()
@@ -0,0 +1,388 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from typing import Union, Dict, List, Any, BinaryIO
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from omics_dashboard_client.json_codec import JsonCodec, default_codec
+from omics_dashboard_client.record.file_record import FileRecord
+from omics_dashboard_client.record.job import Job
+from omics_dashboard_client.record.record import Record
+from omics_dashboard_client.record.user import User
+from omics_dashboard_client.record.workflow import Workflow
+from omics_dashboard_client.session import AnyRecord, AnyRecordType, _decode_token_expiry
+
+
+class AsyncSession:
+    """
+    An asyncio version of Session. Every method that talks to the service is a coroutine. Use it as an async context
+    manager, which authenticates on entry and closes the connection pool on exit:
+
+        async with AsyncSession('https://example.com/omics', 'credentials.json') as session:
+            collection = await session.get(Collection, 12)
+
+    Requires aiohttp.
+    """
+
+    def __init__(self, base_url, credentials=None, auth_token=None, auth_ttl=300, auth_expiry_margin=30,
+                 pool_maxsize=100, pool_maxsize_per_host=10, headers=None, download_chunk_size=1048576,
+                 json_codec=None):
+        # type: (str, Union[str, Dict[str, str]], Union[str, None], float, float, int, int, Dict[str, str], int, Union[JsonCodec, None]) -> None
+        """
+        :param base_url:  The base url of your Omics Dashboard service (ex: 'https://example.com/omics')
+        :param credentials: Either a filename of a json file (which you should have 400 permissions or be similarly secure)
+                            or a dictionary containing an email and password
+        :param auth_token: An existing authentication token to use instead of credentials.
+        :param auth_ttl: How long (in seconds) a successful authentication check is trusted when the token has no
+                         readable expiry.
+        :param auth_expiry_margin: How long (in seconds) before the expiry of the token it is considered expired.
+        :param pool_maxsize: The maximum number of simultaneous connections.
+        :param pool_maxsize_per_host: The maximum number of simultaneous connections to one host.
+        :param headers: Headers sent with every request.
+        :param download_chunk_size: The number of bytes written to disk at a time when downloading files.
+        :param json_codec: The JsonCodec used to encode request bodies and decode responses. Defaults to an OrjsonCodec
+                           if orjson is installed, otherwise the json module is used.
+        """
+        if aiohttp is None:
+            raise ImportError('AsyncSession requires aiohttp. Install it with "pip install aiohttp".')
+        self.__base_url = '{}/api'.format(base_url)
+        self.__initial_credentials = credentials
+        self.__initial_auth_token = auth_token
+        self.__pool_maxsize = pool_maxsize
+        self.__pool_maxsize_per_host = pool_maxsize_per_host
+        self.__headers = dict(headers or {})
+        self.__http = None
+        self.__auth_token = None
+        self.__current_user = None
+        self.__credentials = None
+        self.__auth_ttl = auth_ttl
+        self.__auth_expiry_margin = auth_expiry_margin
+        self.__token_expires_at = None
+        self.__auth_checked_until = None
+        self.__validation_calls_saved = 0
+        self.__auth_lock = None
+        self.__download_chunk_size = download_chunk_size
+        self.__json_codec = json_codec if json_codec is not None else default_codec()
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def open(self):
+        """
+        Create the connection pool and authenticate with the credentials or token given to the constructor.
+        :return:
+        """
+        if self.__http is None:
+            connector = aiohttp.TCPConnector(limit=self.__pool_maxsize, limit_per_host=self.__pool_maxsize_per_host)
+            codec = self.__json_codec
+            self.__http = aiohttp.ClientSession(connector=connector, headers=self.__headers,
+                                                json_serialize=lambda value: codec.dumps(value).decode('utf-8'))
+            self.__auth_lock = asyncio.Lock()
+        await self.authenticate(self.__initial_credentials, self.__initial_auth_token)
+
+    async def close(self):
+        """
+        Close all pooled connections.
+        :return:
+        """
+        if self.__http is not None:
+            await self.__http.close()
+            self.__http = None
+
+    @property
+    def validation_calls_saved(self):
+        # type: () -> int
+        """
+        The number of requests to the current_user endpoint avoided by trusting a previous authentication check.
+        :return:
+        """
+        return self.__validation_calls_saved
+
+    def _auth_headers(self):
+        # type: () -> Dict[str, str]
+        return {'Authorization': 'Bearer {}'.format(self.__auth_token)}
+
+    async def _refresh_current_user(self):
+        async with self.__http.get('{}/current_user'.format(self.__base_url), headers=self._auth_headers()) as res:
+            res.raise_for_status()
+            self.__current_user = User(self.__json_codec.loads(await res.read()), self.__base_url, False)
+        if self.__token_expires_at is not None:
+            self.__auth_checked_until = self.__token_expires_at
+        else:
+            self.__auth_checked_until = time.time() + self.__auth_ttl
+
+    def _set_auth_token(self, auth_token):
+        # type: (str) -> None
+        self.__auth_token = auth_token
+        self.__auth_checked_until = None
+        token_expiry = _decode_token_expiry(auth_token)
+        self.__token_expires_at = token_expiry - self.__auth_expiry_margin if token_expiry is not None else None
+
+    async def authenticate(self, credentials, auth_token=None):
+        try:
+            if auth_token is not None:
+                self._set_auth_token(auth_token)
+                await self._refresh_current_user()
+            elif credentials is not None:
+                credentials = json.load(open(credentials)) if isinstance(credentials, str) else credentials
+                async with self.__http.post('{}/authenticate'.format(self.__base_url), json=credentials) as res:
+                    res.raise_for_status()
+                    token = self.__json_codec.loads(await res.read())['token']
+                self.__credentials = credentials
+                self._set_auth_token(token)
+                await self._refresh_current_user()
+            else:
+                raise ValueError('Credentials or an authentication token must be provided.'
+                                 ' credentials can be a filename or a dictionary containing "email" and "password"')
+        except aiohttp.ClientResponseError as e:
+            message = 'Could not authenticate with provided credentials. Status code {}'.format(e.status)
+            raise ValueError(message)
+
+    async def is_authenticated(self):
+        if self.__auth_token is not None:
+            now = time.time()
+            if self.__token_expires_at is not None and now >= self.__token_expires_at:
+                return False
+            if self.__auth_checked_until is not None and now < self.__auth_checked_until:
+                self.__validation_calls_saved += 1
+                return self.__current_user.active
+            try:
+                await self._refresh_current_user()
+                return self.__current_user.active
+            except aiohttp.ClientResponseError:
+                return False
+        return False
+
+    def invalidate_auth(self):
+        """
+        Forget the result of the last authentication check so that the next request checks the token again.
+        :return:
+        """
+        self.__auth_checked_until = None
+
+    async def _ensure_authenticated(self):
+        async with self.__auth_lock:
+            authenticated = await self.is_authenticated()
+            if not authenticated and self.__credentials is not None:
+                await self.authenticate(self.__credentials)
+                authenticated = self.__current_user.active
+        if not authenticated:
+            raise RuntimeError('Authorization is invalid or expired. Please run authenticate() with your credentials.')
+
+    async def get_auth_header(self):
+        await self._ensure_authenticated()
+        return self._auth_headers()
+
+    async def _request(self, method, url, **kwargs):
+        # type: (str, str, Any) -> aiohttp.ClientResponse
+        """
+        Make an authenticated request. If the server rejects the token, authenticate again and retry once. The caller
+        must release the response.
+        :param method: The HTTP method.
+        :param url: The url of the request.
+        :param kwargs: Passed to aiohttp.ClientSession.request
+        :return:
+        """
+        if self.__http is None:
+            raise RuntimeError('AsyncSession is not open. Use "async with AsyncSession(...)" or await open().')
+        headers = dict(kwargs.pop('headers', None) or {})
+        headers.update(await self.get_auth_header())
+        res = await self.__http.request(method, url, headers=headers, **kwargs)
+        if res.status == 401 and 'data' not in kwargs:
+            res.release()
+            self.invalidate_auth()
+            headers.update(await self.get_auth_header())
+            res = await self.__http.request(method, url, headers=headers, **kwargs)
+        return res
+
+    @staticmethod
+    async def _raise_for_status(res):
+        # type: (aiohttp.ClientResponse) -> None
+        if res.status >= 400:
+            print('Response: ')
+            print(await res.text())
+            res.raise_for_status()
+
+    async def _request_json(self, method, url, **kwargs):
+        # type: (str, str, Any) -> Any
+        res = await self._request(method, url, **kwargs)
+        try:
+            await self._raise_for_status(res)
+            return self.__json_codec.loads(await res.read())
+        finally:
+            res.release()
+
+    async def download_file(self, record, chunk_size=None):
+        # type: (FileRecord, int) -> FileRecord
+        """
+        Download the file associated with a FileRecord. The file is streamed to disk in chunks.
+        :param record:
+        :param chunk_size: The number of bytes written at a time. Defaults to the download_chunk_size of the session.
+        :return:
+        """
+        filename = record.prepare_download()
+        partial_filename = '{}.part'.format(filename)
+        digest = hashlib.sha256()
+        loop = asyncio.get_event_loop()
+        res = await self._request('GET', record.download_url)
+        try:
+            await self._raise_for_status(res)
+            # the file is written on the default executor so that the event loop is not blocked by the disk
+            fp = await loop.run_in_executor(None, open, partial_filename, 'wb')
+            try:
+                async for chunk in res.content.iter_chunked(chunk_size or self.__download_chunk_size):
+                    await loop.run_in_executor(None, fp.write, chunk)
+                    digest.update(chunk)
+            finally:
+                await loop.run_in_executor(None, fp.close)
+        finally:
+            res.release()
+        os.rename(partial_filename, filename)
+        record.finish_download(filename, digest.hexdigest())
+        return record
+
+    async def get(self, record_type, record_id, download_file=False):
+        # type: (AnyRecordType, Union[str, int], bool) -> AnyRecord
+        """
+        Get a record
+        :param record_type: The type of the record (i.e. Sample, Collection, Analysis)
+        :param record_id: The id of the record (an int for everything but job, a string uuid for job)
+        :param download_file: Whether to also download the file of a FileRecord.
+        :return: The record with the specified id
+        """
+        url = '{}/{}/{}'.format(self.__base_url, record_type.url_suffix, record_id)
+        record = record_type(await self._request_json('GET', url), self.__base_url, self.__current_user.admin)
+        if download_file:
+            return await self.download_file(record)
+        return record
+
+    async def get_all(self, record_type):
+        # type: (AnyRecordType) -> List[AnyRecord]
+        """
+        Get all the records of a particular type.
+        :param record_type:
+        :return:
+        """
+        url = '{}/{}'.format(self.__base_url, record_type.url_suffix)
+        return [record_type(entry, self.__base_url, self.__current_user.admin)
+                for entry in await self._request_json('GET', url)]
+
+    async def delete(self, record):
+        # type: (Record) -> Dict[str, str]
+        """
+        Delete a record. Record object will be set to invalid
+        :param record:
+        :return:
+        """
+        if record.valid:
+            out = await self._request_json('DELETE', record.update_url)
+            record.invalidate()
+            return out
+        else:
+            raise ValueError('Record is not valid.')
+
+    @staticmethod
+    def _form_data(fields, fp=None):
+        # type: (Dict[str, Any], Union[BinaryIO, None]) -> aiohttp.FormData
+        """
+        Encode fields (and a file) the same way requests encodes data=fields (and files={'file': ...}).
+        :param fields:
+        :param fp: An open file, closed by the caller.
+        :return:
+        """
+        form = aiohttp.FormData()
+        for key, value in (fields or {}).items():
+            for item in (value if isinstance(value, (list, tuple)) else [value]):
+                if item is not None:
+                    form.add_field(key, str(item))
+        if fp is not None:
+            form.add_field('file', fp, filename=os.path.basename(fp.name))
+        return form
+
+    async def _post_form(self, url, fields, filename=None):
+        # type: (str, Dict[str, Any], Union[str, None]) -> Any
+        """
+        Post fields (and a file) as multipart/form-data, closing the file whether or not the request succeeds.
+        :param url:
+        :param fields:
+        :param filename:
+        :return: The decoded response.
+        """
+        fp = open(filename, 'rb') if filename is not None else None
+        try:
+            return await self._request_json('POST', url, data=self._form_data(fields, fp))
+        finally:
+            if fp is not None:
+                fp.close()
+
+    async def update(self, record, upload_file=None):
+        # type: (Record, bool) -> Record
+        """
+        Update the server with the values of the record
+        :param record: The record to update on the server
+        :param upload_file: Only applies when record is FileRecord. Default behavior will be as if it is true if the file is downloaded.
+        :return:
+        """
+        if record.valid:
+            if upload_file is None:
+                upload_file = isinstance(record, FileRecord) and record.local_filename is not None
+            if isinstance(record, FileRecord) and record.local_filename is not None and upload_file:
+                # We make two requests because multipart/form-data doesn't handle arrays very well
+                await self._post_form(record.update_url, None, record.local_filename)
+            record.update(await self._request_json('POST', record.update_url, json=record.serialize()),
+                          self.__base_url)
+            return record
+        else:
+            raise ValueError('Record is not valid.')
+
+    async def create(self, record):
+        # type: (Record) -> Record
+        """
+        Create a new record. Record object will be populated with new id
+        :param record: A record
+        :return:
+        """
+        if record.valid:
+            if isinstance(record, FileRecord) and record.local_filename is not None:
+                data = await self._post_form(record.upload_url, record.serialize(), record.local_filename)
+            else:
+                data = await self._post_form(record.create_url, record.serialize())
+            record.update(data, self.__base_url)
+            return record
+        else:
+            raise ValueError('Record is not valid.')
+
+    async def submit_job(self, workflow, job_params):
+        # type: (Union[Workflow, Dict[str, Any]], Dict[str, Any]) -> Job
+        """
+        Start a job on the job server.
+        :param workflow: Either a workflow or the workflow definition as dictionary.
+        :param job_params: Values needed by the workflow to run.
+        :return:
+        """
+        submit_url = '{}/{}'.format(self.__base_url, Job.url_suffix)
+        data = {
+            'job': job_params,
+            'workflow': workflow.serialize() if isinstance(workflow, Workflow) else workflow
+        }
+        return Job(await self._request_json('POST', submit_url, json=data), self.__base_url)
+
+    async def cancel_job(self, job):
+        # type: (Job) -> Dict[str, Any]
+        """
+        Cancel a running job
+        :param job:
+        :return:
+        """
+        url = '{}/{}/{}?method=cancel'.format(self.__base_url, Job.url_suffix, job.id)
+        return await self._request_json('POST', url, json={})
@@ -0,0 +1,181 @@
+from typing import Any, List, Union
+
+
+class BatchResult(object):
+    """
+    The outcome of one item of a batch operation.
+    """
+
+    def __init__(self, key, value=None, error=None, size=0, elapsed=0.0):
+        # type: (Any, Any, Union[Exception, None], int, float) -> None
+        """
+        :param key: What the operation was applied to (a record or a record id).
+        :param value: What the operation produced.
+        :param error: The exception raised by the operation, if it failed.
+        :param size: The number of bytes transferred.
+        :param elapsed: How long the operation took in seconds.
+        """
+        self._key = key
+        self._value = value
+        self._error = error
+        self._size = size
+        self._elapsed = elapsed
+
+    @property
+    def key(self):
+        # type: () -> Any
+        """
+        What the operation was applied to.
+        :return:
+        """
+        return self._key
+
+    @property
+    def value(self):
+        # type: () -> Any
+        """
+        What the operation produced. None if it failed without producing anything.
+        :return:
+        """
+        return self._value
+
+    @property
+    def error(self):
+        # type: () -> Union[Exception, None]
+        """
+        The exception raised by the operation. None if it succeeded.
+        :return:
+        """
+        return self._error
+
+    @property
+    def succeeded(self):
+        # type: () -> bool
+        return self._error is None
+
+    @property
+    def size(self):
+        # type: () -> int
+        """
+        The number of bytes transferred.
+        :return:
+        """
+        return self._size
+
+    @property
+    def elapsed(self):
+        # type: () -> float
+        """
+        How long the operation took in seconds.
+        :return:
+        """
+        return self._elapsed
+
+    def __repr__(self):
+        if self.succeeded:
+            return '<BatchResult {!r}: ok>'.format(self._key)
+        return '<BatchResult {!r}: {!r}>'.format(self._key, self._error)
+
+
+class BatchReport(object):
+    """
+    The outcomes of a batch operation, in the order the items were given.
+    """
+
+    def __init__(self, results, elapsed):
+        # type: (List[BatchResult], float) -> None
+        """
+        :param results: One result per item.
+        :param elapsed: The wall time of the whole batch in seconds.
+        """
+        self._results = results
+        self._elapsed = elapsed
+
+    def __iter__(self):
+        return iter(self._results)
+
+    def __len__(self):
+        return len(self._results)
+
+    def __getitem__(self, item):
+        return self._results[item]
+
+    def __repr__(self):
+        return '<{} {} succeeded, {} failed, {:.2f} s>'.format(type(self).__name__, len(self.succeeded),
+                                                               len(self.failed), self._elapsed)
+
+    @property
+    def results(self):
+        # type: () -> List[BatchResult]
+        return self._results
+
+    @property
+    def succeeded(self):
+        # type: () -> List[BatchResult]
+        return [result for result in self._results if result.succeeded]
+
+    @property
+    def failed(self):
+        # type: () -> List[BatchResult]
+        return [result for result in self._results if not result.succeeded]
+
+    @property
+    def values(self):
+        # type: () -> List[Any]
+        """
+        The values of the items, with None for failed items.
+        :return:
+        """
+        return [result.value for result in self._results]
+
+    @property
+    def elapsed(self):
+        # type: () -> float
+        """
+        The wall time of the whole batch in seconds.
+        :return:
+        """
+        return self._elapsed
+
+    @property
+    def total_size(self):
+        # type: () -> int
+        """
+        The number of bytes transferred by all items.
+        :return:
+        """
+        return sum(result.size for result in self._results)
+
+    @property
+    def throughput(self):
+        # type: () -> float
+        """
+        The aggregate transfer rate of the batch in bytes per second.
+        :return:
+        """
+        return self.total_size / self._elapsed if self._elapsed > 0 else 0.0
+
+    def raise_for_errors(self):
+        """
+        Raise the error of the first failed item, if any item failed.
+        :return:
+        """
+        for result in self._results:
+            if result.error is not None:
+                raise result.error
+
+
+class JobReport(BatchReport):
+    """
+    The outcomes of a batch of jobs, in the order their parameters were given. The value of each result is its job,
+    when it was submitted. Jobs which did not succeed have an error.
+    """
+
+    @property
+    def jobs_per_minute(self):
+        # type: () -> float
+        """
+        The number of jobs which succeeded per minute of wall time.
+        :return:
+        """
+        return 60 * len(self.succeeded) / self._elapsed if self._elapsed > 0 else 0.0
@@ -0,0 +1,223 @@
+import os
+import re
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import List, Tuple, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from omics_dashboard_client.record.file_record import FileRecord
+
+
+@contextmanager
+def _locked(lock_filename, shared=False):
+    """
+    Hold an advisory lock on lock_filename. Where fcntl is not available, this does not lock.
+    :param lock_filename:
+    :param shared: Whether other shared holders are allowed at the same time.
+    :return:
+    """
+    with open(lock_filename, 'a') as fp:
+        if fcntl is not None:
+            fcntl.flock(fp.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fp.fileno(), fcntl.LOCK_UN)
+
+
+class DownloadCache(object):
+    """
+    A directory of downloaded files that persists between sessions and processes. Files are keyed by the type and id of
+    their record and by the checksum of the file (when the service provides one in file_info) or the updated_on date of
+    the record, so a changed record is never served from a stale entry. The least recently used files are removed when
+    the cache grows beyond max_size. Several processes may use the same directory at once.
+    """
+
+    def __init__(self, root, max_size=None, link_files=False):
+        # type: (str, Union[int, None], bool) -> None
+        """
+        :param root: The directory to keep files in. Created if it does not exist.
+        :param max_size: The maximum total size of the cached files in bytes. None for no limit.
+        :param link_files: Whether to hardlink files between the cache and records instead of copying them, when they
+                           are on the same filesystem. Only use this if you do not modify downloaded files in place, as
+                           changes to a linked file also change the cached copy.
+        """
+        self._root = os.path.abspath(root)
+        self._max_size = max_size
+        self._link_files = link_files
+        if not os.path.isdir(self._root):
+            os.makedirs(self._root)
+        self._lock_filename = os.path.join(self._root, '.lock')
+
+    @property
+    def root(self):
+        # type: () -> str
+        return self._root
+
+    @property
+    def max_size(self):
+        # type: () -> Union[int, None]
+        return self._max_size
+
+    @property
+    def size(self):
+        # type: () -> int
+        """
+        The total size of the cached files in bytes.
+        :return:
+        """
+        return sum(size for _, size, _ in self._entries())
+
+    @staticmethod
+    def _record_prefix(record):
+        # type: (FileRecord) -> str
+        return '{}-{}-'.format(type(record).url_suffix.replace('/', '_'), record.id)
+
+    @staticmethod
+    def _version(record):
+        # type: (FileRecord) -> str
+        checksum = record.file_info.get('checksum') if isinstance(record.file_info, dict) else None
+        if checksum is not None:
+            return re.sub(r'[^A-Za-z0-9]', '', str(checksum))
+        return record.updated_on.strftime('%Y%m%dT%H%M%S')
+
+    def _entry_filename(self, record):
+        # type: (FileRecord) -> str
+        return os.path.join(self._root, '{}{}-{}'.format(self._record_prefix(record), self._version(record),
+                                                         os.path.basename(record.filename)))
+
+    def _entries(self):
+        # type: () -> List[Tuple[str, int, float]]
+        entries = []
+        for name in os.listdir(self._root):
+            if name.startswith('.'):
+                continue
+            path = os.path.join(self._root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _place(self, source, destination):
+        # type: (str, str) -> None
+        """
+        Link or copy source to destination atomically, so that nobody sees a partial file.
+        :param source:
+        :param destination:
+        :return:
+        """
+        fd, temp_filename = tempfile.mkstemp(dir=os.path.dirname(destination), prefix='.tmp-')
+        os.close(fd)
+        try:
+            linked = False
+            if self._link_files:
+                os.remove(temp_filename)
+                try:
+                    os.link(source, temp_filename)
+                    linked = True
+                except OSError:
+                    pass
+            if not linked:
+                shutil.copyfile(source, temp_filename)
+            if os.path.isfile(destination):
+                os.remove(destination)
+            os.rename(temp_filename, destination)
+        finally:
+            if os.path.isfile(temp_filename):
+                os.remove(temp_filename)
+
+    def cached_size(self, record):
+        # type: (FileRecord) -> Union[int, None]
+        """
+        :param record:
+        :return: The size of the cached file of a record in bytes, or None if it is not cached.
+        """
+        with _locked(self._lock_filename, shared=True):
+            try:
+                return os.path.getsize(self._entry_filename(record))
+            except OSError:
+                return None
+
+    def fetch(self, record, filename):
+        # type: (FileRecord, str) -> bool
+        """
+        Put the cached file of a record at filename, if it is cached.
+        :param record:
+        :param filename: Where the record expects its file.
+        :return: Whether the file was in the cache.
+        """
+        entry_filename = self._entry_filename(record)
+        with _locked(self._lock_filename, shared=True):
+            if not os.path.isfile(entry_filename):
+                return False
+            now = time.time()
+            os.utime(entry_filename, (now, now))
+            self._place(entry_filename, filename)
+        return True
+
+    def store(self, record, filename):
+        # type: (FileRecord, str) -> None
+        """
+        Add the downloaded file of a record to the cache, replacing older versions of the same record.
+        :param record:
+        :param filename: The downloaded file.
+        :return:
+        """
+        entry_filename = self._entry_filename(record)
+        prefix = self._record_prefix(record)
+        with _locked(self._lock_filename):
+            for path, _, _ in self._entries():
+                if os.path.basename(path).startswith(prefix) and path != entry_filename:
+                    os.remove(path)
+            self._place(filename, entry_filename)
+            self._evict()
+
+    def _evict(self):
+        if self._max_size is None:
+            return
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self._max_size:
+                break
+            os.remove(path)
+            total -= size
+
+    def evict(self):
+        """
+        Remove the least recently used files until the cache fits in max_size.
+        :return:
+        """
+        with _locked(self._lock_filename):
+            self._evict()
+
+    def invalidate(self, record):
+        # type: (FileRecord) -> None
+        """
+        Remove all cached versions of the file of a record.
+        :param record:
+        :return:
+        """
+        prefix = self._record_prefix(record)
+        with _locked(self._lock_filename):
+            for path, _, _ in self._entries():
+                if os.path.basename(path).startswith(prefix):
+                    os.remove(path)
+
+    def clear(self):
+        """
+        Remove all cached files.
+        :return:
+        """
+        with _locked(self._lock_filename):
+            for path, _, _ in self._entries():
+                os.remove(path)
@@ -0,0 +1,373 @@
+import datetime
+import hashlib
+import io
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Tuple, Union
+
+try:
+    from urllib.parse import parse_qs, urlsplit
+except ImportError:  # Python 2
+    from urlparse import parse_qs, urlsplit
+
+import h5py
+import numpy as np
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+FILE_RECORD_TYPES = ('collections', 'samples', 'external_files', 'workflows')
+RECORD_TYPES = FILE_RECORD_TYPES + ('analyses', 'sample_groups', 'users', 'user_groups')
+
+_ROUTE = re.compile(r'^(?P<suffix>[a-z_]+)(?:/(?P<action>download|upload|create))?(?:/(?P<id>[^/]+))?$')
+
+
+def synthetic_hdf5(size, columns=1000):
+    # type: (int, int) -> bytes
+    """
+    Make an HDF5 file like the ones stored by Omics Dashboard: a matrix Y of spectra, their x axis and a label per
+    spectrum.
+    :param size: The approximate size of the file in bytes.
+    :param columns: The number of columns of Y (and the length of x).
+    :return: The contents of the file.
+    """
+    rows = max(1, size // (8 * columns))
+    fd, filename = tempfile.mkstemp(suffix='.h5')
+    os.close(fd)
+    try:
+        with h5py.File(filename, 'w') as fp:
+            fp.attrs['name'] = 'synthetic'
+            fp.create_dataset('Y', data=np.random.RandomState(0).random_sample((rows, columns)))
+            fp.create_dataset('x', data=np.linspace(0, 10, columns))
+            fp.create_dataset('label', data=np.array(['spectrum {}'.format(i) for i in range(rows)], dtype='S'))
+        with open(filename, 'rb') as fp:
+            return fp.read()
+    finally:
+        os.remove(filename)
+
+
+def _now():
+    # type: () -> str
+    return datetime.datetime.now().strftime('%Y-%m-%dT%H:%M:%S')
+
+
+def _parse_multipart(body, content_type):
+    # type: (bytes, str) -> Tuple[Dict[str, List[str]], Union[bytes, None]]
+    """
+    :param body: A multipart/form-data body.
+    :param content_type: The Content-Type header of the body.
+    :return: The form fields and the contents of the file, if there is one.
+    """
+    boundary = content_type.split('boundary=', 1)[1].strip('"').encode('utf-8')
+    fields = {}
+    content = None
+    for part in body.split(b'--' + boundary)[1:-1]:
+        head, _, value = part[2:-2].partition(b'\r\n\r\n')
+        disposition = head.decode('utf-8')
+        name = re.search(r'name="([^"]*)"', disposition).group(1)
+        if 'filename="' in disposition:
+            content = value
+        else:
+            fields.setdefault(name, []).append(value.decode('utf-8'))
+    return fields, content
+
+
+class FakeOmicsDashboard(BaseAdapter):
+    """
+    An Omics Dashboard service which lives in memory, for benchmarking and trying out the client without a server. It
+    is a requests transport adapter which answers the requests Session makes: authentication, listing, getting,
+    creating, updating and deleting records, downloading and uploading files (with range requests), and submitting,
+    polling and cancelling jobs. Records are synthetic and all files of a type share one synthetic HDF5 file until a
+    file is uploaded. Responses carry ETags, and conditional requests are answered with 304 Not Modified.
+
+    Pass it to Session as adapter, or use the session method.
+    """
+
+    def __init__(self, base_url='http://omics.example.com', records=None, file_size=1048576, latency=0.0,
+                 job_duration=1.0):
+        # type: (str, Union[Dict[str, int], None], int, float, float) -> None
+        """
+        :param base_url: The base url sessions use to reach the service.
+        :param records: The number of synthetic records of each type, by url suffix (ex: {'collections': 10000}).
+        :param file_size: The approximate size of the synthetic files in bytes.
+        :param latency: How long (in seconds) each request takes before it is answered.
+        :param job_duration: How long (in seconds) submitted jobs run before they succeed.
+        """
+        super(FakeOmicsDashboard, self).__init__()
+        self._base_url = base_url
+        self._api_prefix = '{}/api/'.format(base_url)
+        self._file_size = file_size
+        self._latency = latency
+        self._job_duration = job_duration
+        self._lock = threading.RLock()
+        self._records = {suffix: OrderedDict() for suffix in RECORD_TYPES}  # type: Dict[str, Dict[int, Dict[str, Any]]]
+        self._list_bodies = {}  # type: Dict[str, bytes]
+        self._files = {}  # type: Dict[Tuple[str, int], bytes]
+        self._default_file = None  # type: Union[bytes, None]
+        self._jobs = OrderedDict()  # type: Dict[str, Dict[str, Any]]
+        self._next_id = 1
+        self._requests = 0
+        self.user = {
+            'id': 1, 'created_on': '2019-01-01T00:00:00', 'updated_on': '2019-01-01T00:00:00',
+            'email': 'benchmark@example.com', 'name': 'Benchmark', 'admin': False, 'active': True,
+            'primary_user_group_id': 1, 'group_ids': [1], 'admin_group_ids': [1]
+        }
+        self._records['users'][1] = self.user
+        self._records['user_groups'][1] = {
+            'id': 1, 'created_on': '2019-01-01T00:00:00', 'updated_on': '2019-01-01T00:00:00', 'name': 'Benchmark',
+            'description': 'The group of the benchmark user.', 'creator_id': 1, 'members': [{'id': 1}],
+            'admins': [{'id': 1}], 'is_write_permitted': True
+        }
+        for suffix, count in (records or {}).items():
+            self.add_records(suffix, count)
+
+    @property
+    def base_url(self):
+        # type: () -> str
+        return self._base_url
+
+    @property
+    def request_count(self):
+        # type: () -> int
+        """
+        The number of requests answered.
+        :return:
+        """
+        return self._requests
+
+    def session(self, **kwargs):
+        """
+        Create a Session connected to this service.
+        :param kwargs: Passed to Session
+        :return:
+        """
+        from omics_dashboard_client.session import Session
+        kwargs.setdefault('credentials', {'email': self.user['email'], 'password': 'password'})
+        return Session(self._base_url, adapter=self, **kwargs)
+
+    def add_records(self, suffix, count):
+        # type: (str, int) -> List[int]
+        """
+        Add synthetic records.
+        :param suffix: The url suffix of the record type (ex: 'collections').
+        :param count: How many records to add.
+        :return: The ids of the new records.
+        """
+        if suffix in ('users', 'user_groups'):
+            raise ValueError('Only the benchmark user and its group exist.')
+        with self._lock:
+            ids = []
+            for _ in range(count):
+                record = self._new_record(suffix, {})
+                ids.append(record['id'])
+            return ids
+
+    def _new_record(self, suffix, fields):
+        # type: (str, Dict[str, Any]) -> Dict[str, Any]
+        record_id = self._next_id
+        self._next_id += 1
+        now = datetime.datetime(2019, 1, 1) + datetime.timedelta(seconds=record_id)
+        record = {
+            'id': record_id, 'created_on': now.isoformat(), 'updated_on': now.isoformat(),
+            'name': '{} {}'.format(suffix, record_id), 'description': 'A synthetic record.', 'creator_id': 1,
+            'owner_id': 1, 'last_editor_id': 1, 'group_can_read': True, 'group_can_write': True, 'all_can_read': True,
+            'all_can_write': False, 'user_group_id': 1, 'is_write_permitted': True
+        }
+        if suffix in FILE_RECORD_TYPES:
+            record.update({'filename': '/data/{}/{}.h5'.format(suffix, record_id), 'file_type': 'hdf5',
+                           'file_info': {}, 'analysis_ids': []})
+        if suffix == 'collections':
+            record['parent_id'] = None
+        elif suffix == 'samples':
+            record['sample_group_ids'] = []
+            del record['analysis_ids']
+        elif suffix == 'analyses':
+            record.update({'collections': [], 'external_files': [], 'workflows': []})
+        elif suffix == 'sample_groups':
+            record.update({'samples': [], 'upload_job_id': None})
+        elif suffix == 'workflows':
+            record.update({'workflow_language': 'cwl', 'workflow_definition': {}, 'file_type': 'json'})
+        for key, value in fields.items():
+            if key in record and key not in ('id', 'created_on', 'updated_on'):
+                record[key] = value
+        self._records[suffix][record_id] = record
+        self._list_bodies.pop(suffix, None)
+        return record
+
+    def _file(self, suffix, record_id):
+        # type: (str, int) -> bytes
+        content = self._files.get((suffix, record_id))
+        if content is None:
+            if self._default_file is None:
+                self._default_file = synthetic_hdf5(self._file_size)
+            content = self._default_file
+        return content
+
+    def _job(self, job_id):
+        # type: (str) -> Dict[str, Any]
+        job = self._jobs[job_id]
+        if job['status'] == 'Running' and time.time() - job['_submitted_on'] >= self._job_duration:
+            job['status'] = 'Succeeded'
+            job['end'] = _now()
+        return {key: value for key, value in job.items() if not key.startswith('_')}
+
+    @staticmethod
+    def _response(request, status, body, headers=None):
+        # type: (requests.PreparedRequest, int, Any, Union[Dict[str, str], None]) -> requests.Response
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode('utf-8')
+        response = requests.Response()
+        response.status_code = status
+        response.reason = {200: 'OK', 206: 'Partial Content', 304: 'Not Modified', 400: 'Bad Request',
+                           401: 'Unauthorized', 404: 'Not Found', 416: 'Range Not Satisfiable'}.get(status, '')
+        response.headers = CaseInsensitiveDict(headers or {})
+        response.headers.setdefault('Content-Type', 'application/json')
+        response.headers['Content-Length'] = str(len(body))
+        response.raw = io.BytesIO(body)
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        return response
+
+    def _json_response(self, request, body):
+        # type: (requests.PreparedRequest, Any) -> requests.Response
+        content = body if isinstance(body, bytes) else json.dumps(body).encode('utf-8')
+        etag = '"{}"'.format(hashlib.md5(content).hexdigest())
+        if request.headers.get('If-None-Match') == etag:
+            return self._response(request, 304, b'', {'ETag': etag})
+        return self._response(request, 200, content, {'ETag': etag})
+
+    @staticmethod
+    def _body(request):
+        # type: (requests.PreparedRequest) -> bytes
+        body = request.body
+        if body is None:
+            return b''
+        if hasattr(body, 'read'):
+            return b''.join(iter(lambda: body.read(1048576), b''))
+        if not isinstance(body, bytes):
+            return body.encode('utf-8')
+        return body
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        if self._latency:
+            time.sleep(self._latency)
+        url = urlsplit(request.url)
+        path = request.url.split('?', 1)[0]
+        if not path.startswith(self._api_prefix):
+            return self._response(request, 404, {'message': 'Not found.'})
+        path = path[len(self._api_prefix):]
+        query = parse_qs(url.query)
+        body = self._body(request)
+        with self._lock:
+            self._requests += 1
+            if path == 'authenticate':
+                return self._response(request, 200, {'token': 'a.e30.c'})
+            if request.headers.get('Authorization') is None:
+                return self._response(request, 401, {'message': 'Not authenticated.'})
+            if path == 'current_user':
+                return self._json_response(request, self.user)
+            if path.startswith('jobs'):
+                return self._send_jobs(request, path, query, body)
+            if path == 'workflows/workflow_modules':
+                return self._json_response(request, [])
+            match = _ROUTE.match(path)
+            if match is None or match.group('suffix') not in self._records:
+                return self._response(request, 404, {'message': 'Not found.'})
+            return self._send_records(request, match.group('suffix'), match.group('action'), match.group('id'), query,
+                                      body)
+
+    def _send_records(self, request, suffix, action, record_id, query, body):
+        # type: (requests.PreparedRequest, str, Union[str, None], Union[str, None], Dict[str, List[str]], bytes) -> requests.Response
+        records = self._records[suffix]
+        if record_id is None:
+            if request.method == 'GET':
+                return self._list(request, suffix, query)
+            if action == 'upload':
+                fields, content = _parse_multipart(body, request.headers['Content-Type'])
+                record = self._new_record(suffix, {key: values[0] for key, values in fields.items()})
+                self._files[(suffix, record['id'])] = content
+            else:
+                fields = parse_qs(body.decode('utf-8'))
+                record = self._new_record(suffix, {key: values[0] for key, values in fields.items()})
+            return self._json_response(request, record)
+        try:
+            record = records[int(record_id)]
+        except (KeyError, ValueError):
+            return self._response(request, 404, {'message': 'Record {} not found.'.format(record_id)})
+        if action == 'download':
+            return self._download(request, self._file(suffix, record['id']))
+        if request.method == 'GET':
+            return self._json_response(request, record)
+        if request.method == 'DELETE':
+            del records[record['id']]
+            self._files.pop((suffix, record['id']), None)
+            self._list_bodies.pop(suffix, None)
+            return self._response(request, 200, {'message': 'Deleted {} {}.'.format(suffix, record['id'])})
+        if request.headers.get('Content-Type', '').startswith('multipart/form-data'):
+            _, content = _parse_multipart(body, request.headers['Content-Type'])
+            self._files[(suffix, record['id'])] = content
+        else:
+            for key, value in json.loads(body.decode('utf-8') or '{}').items():
+                if key in record and key not in ('id', 'created_on'):
+                    record[key] = value
+        record['updated_on'] = _now()
+        self._list_bodies.pop(suffix, None)
+        return self._json_response(request, record)
+
+    def _list(self, request, suffix, query):
+        # type: (requests.PreparedRequest, str, Dict[str, List[str]]) -> requests.Response
+        if 'page_size' in query:
+            page = int(query.get('page', ['1'])[0])
+            page_size = int(query['page_size'][0])
+            records = list(self._records[suffix].values())[(page - 1) * page_size:page * page_size]
+            return self._json_response(request, records)
+        body = self._list_bodies.get(suffix)
+        if body is None:
+            body = self._list_bodies[suffix] = json.dumps(list(self._records[suffix].values())).encode('utf-8')
+        return self._json_response(request, body)
+
+    def _download(self, request, content):
+        # type: (requests.PreparedRequest, bytes) -> requests.Response
+        headers = {'Content-Type': 'application/octet-stream', 'Accept-Ranges': 'bytes'}
+        byte_range = re.match(r'bytes=(\d+)-$', request.headers.get('Range', ''))
+        if byte_range is None:
+            return self._response(request, 200, content, headers)
+        start = int(byte_range.group(1))
+        if start >= len(content):
+            return self._response(request, 416, b'', headers)
+        headers['Content-Range'] = 'bytes {}-{}/{}'.format(start, len(content) - 1, len(content))
+        return self._response(request, 206, content[start:], headers)
+
+    def _send_jobs(self, request, path, query, body):
+        # type: (requests.PreparedRequest, str, Dict[str, List[str]], bytes) -> requests.Response
+        if path == 'jobs':
+            if request.method == 'GET':
+                return self._response(request, 200, [self._job(job_id) for job_id in self._jobs])
+            job_id = str(uuid.uuid4())
+            now = _now()
+            self._jobs[job_id] = {
+                'id': job_id, 'owner_id': self.user['id'], 'user_group_id': 1, 'type': 'cwl', 'submission': now,
+                'start': now, 'end': None, 'status': 'Running', 'logs': {}, '_submitted_on': time.time(),
+                '_params': json.loads(body.decode('utf-8')).get('job')
+            }
+            return self._response(request, 200, self._job(job_id))
+        job_id = path[len('jobs/'):]
+        if job_id not in self._jobs:
+            return self._response(request, 404, {'message': 'Job {} not found.'.format(job_id)})
+        if request.method == 'POST' and query.get('method') == ['cancel']:
+            job = self._jobs[job_id]
+            if job['status'] == 'Running':
+                job['status'] = 'Aborted'
+                job['end'] = _now()
+            return self._response(request, 200, {'message': 'Job {} cancelled.'.format(job_id)})
+        return self._response(request, 200, self._job(job_id))
+
+    def close(self):
+        pass
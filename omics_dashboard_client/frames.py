@@ -0,0 +1,136 @@
+import math
+from typing import Any, Dict, Iterable, List, Type, Union
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+from omics_dashboard_client.record.lite_record import lite_record_fields, lite_record_type
+from omics_dashboard_client.record.record import Record
+
+# The fields the service sends as lists of {'id': ...}, and the column holding just the ids
+_NESTED_ID_FIELDS = {
+    'samples': 'sample_ids',
+    'members': 'member_ids',
+    'admins': 'admin_ids',
+    'workflows': 'workflow_ids',
+    'collections': 'collection_ids',
+    'external_files': 'external_file_ids'
+}
+_NESTED_ID_COLUMNS = {column: field for field, column in _NESTED_ID_FIELDS.items()}
+
+_DATE_FIELDS = ('created_on', 'updated_on')
+_DATE_FORMAT = '%Y-%m-%dT%H:%M:%S'
+
+
+def _id_list_column(values):
+    # type: (List[Union[List[Any], None]]) -> Any
+    """
+    Lists of ids as an Arrow list column, which keeps all the ids of the column in one buffer, if pyarrow (and pandas
+    1.5 or later) is installed. Otherwise, and for lists which are not integers, as an object column of tuples.
+    :param values:
+    :return:
+    """
+    if pa is not None and hasattr(pd, 'ArrowDtype'):
+        try:
+            return pd.array(values, dtype=pd.ArrowDtype(pa.list_(pa.int64())))
+        except (TypeError, ValueError, pa.ArrowException):
+            pass
+    return [tuple(value) if isinstance(value, list) else value for value in values]
+
+
+def _column(field, values):
+    # type: (str, List[Any]) -> Any
+    if field in _DATE_FIELDS:
+        return pd.to_datetime(values, format=_DATE_FORMAT, errors='coerce')
+    if field in _NESTED_ID_FIELDS:
+        return _id_list_column([[item['id'] for item in value] if value is not None else None for value in values])
+    if field == 'id' or field.endswith('_id'):
+        try:
+            return pd.array(values, dtype='Int64')
+        except (TypeError, ValueError):
+            return values  # job ids are uuids
+    if isinstance(next((value for value in values if value is not None), None), list):
+        if field.endswith('_ids'):
+            return _id_list_column(values)
+        return [tuple(value) if isinstance(value, list) else value for value in values]
+    return values
+
+
+def entries_to_frame(entries, columns=None):
+    # type: (List[Dict[str, Any]], Union[Iterable[str], None]) -> pd.DataFrame
+    """
+    Arrange records as received from the service into a DataFrame with one row per record, indexed by id.
+    created_on and updated_on become datetime64 columns and ids which may be missing become nullable Int64 columns.
+    Lists of ids, including lists of linked records (ex: the samples of a sample group, in a column named sample_ids),
+    become Arrow list columns if pyarrow is installed, and object columns of tuples otherwise. Other lists become
+    tuples.
+    :param entries: The decoded JSON of the records.
+    :param columns: The columns to keep. None for all the fields of the first record.
+    :return:
+    """
+    if columns is None:
+        columns = [_NESTED_ID_FIELDS.get(field, field) for field in entries[0] if field != 'id'] if entries else []
+    fields = []
+    for column in columns:
+        field = _NESTED_ID_COLUMNS.get(column, column)
+        if entries and field not in entries[0]:
+            raise ValueError('The records have no field {}.'.format(column))
+        fields.append(field)
+    return pd.DataFrame({column: _column(field, [entry.get(field) for entry in entries])
+                         for column, field in zip(columns, fields) if column != 'id'},
+                        index=pd.Index(_column('id', [entry.get('id') for entry in entries]), name='id'))
+
+
+def required_columns(record_type):
+    # type: (Type[Record]) -> List[str]
+    """
+    The columns a DataFrame made by entries_to_frame needs for records of a type to be made from its rows.
+    :param record_type: A record type (ex: Sample).
+    :return:
+    """
+    return [_NESTED_ID_FIELDS.get(field, field) for field in lite_record_fields(lite_record_type(record_type))
+            if field not in ('id', 'is_write_permitted')]  # the index, and a field the service may leave out
+
+
+def _to_json_value(value):
+    # type: (Any) -> Any
+    if value is None or value is pd.NA or value is pd.NaT:
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.strftime(_DATE_FORMAT)
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, tuple):
+        return list(value)
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return value
+
+
+def frame_to_entries(frame):
+    # type: (pd.DataFrame) -> List[Dict[str, Any]]
+    """
+    The reverse of entries_to_frame: the rows of a DataFrame as records as received from the service. Only the columns
+    of the DataFrame are included.
+    :param frame:
+    :return:
+    """
+    columns = list(frame.columns)
+    entries = []
+    for record_id, row in zip(frame.index, frame.itertuples(index=False, name=None)):
+        entry = {'id': _to_json_value(record_id)}
+        for column, value in zip(columns, row):
+            value = _to_json_value(value)
+            if column in _NESTED_ID_COLUMNS:
+                entry[_NESTED_ID_COLUMNS[column]] = [{'id': item} for item in value] if value is not None else None
+            else:
+                entry[column] = value
+        entries.append(entry)
+    return entries
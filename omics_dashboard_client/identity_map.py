@@ -0,0 +1,147 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Tuple, Type, Union
+
+from omics_dashboard_client.record.file_record import FileRecord
+from omics_dashboard_client.record.record import Record
+
+
+def _local_size(record):
+    # type: (Record) -> int
+    if isinstance(record, FileRecord) and record.local_filename is not None:
+        try:
+            return os.path.getsize(record.local_filename)
+        except OSError:
+            return 0
+    return 0
+
+
+class IdentityMap(object):
+    """
+    The records a session has handed out, keyed by type and id, so that looking up the same record twice returns the
+    same object (with its downloaded file) instead of a copy. The least recently used records are forgotten when there
+    are more than max_records, and the least recently used records with downloaded files are forgotten when the files
+    take more than max_bytes. A forgotten record is not changed, and its temporary files are removed as usual once
+    nothing refers to it.
+    """
+
+    def __init__(self, max_records=1024, max_bytes=None):
+        # type: (Union[int, None], Union[int, None]) -> None
+        """
+        :param max_records: The maximum number of records kept. None for no limit.
+        :param max_bytes: The maximum total size of the downloaded files of the records kept, in bytes. None for no
+                          limit.
+        """
+        self._max_records = max_records
+        self._max_bytes = max_bytes
+        self._entries = OrderedDict()  # type: Dict[Tuple[Type[Record], int], Tuple[Record, int]]
+        self._bytes = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, record):
+        # type: (Record) -> bool
+        return self.get(type(record), record.id) is record
+
+    @property
+    def max_records(self):
+        # type: () -> Union[int, None]
+        return self._max_records
+
+    @property
+    def max_bytes(self):
+        # type: () -> Union[int, None]
+        return self._max_bytes
+
+    @property
+    def size(self):
+        # type: () -> int
+        """
+        The total size of the downloaded files of the records kept, in bytes, as of when they were last added.
+        :return:
+        """
+        return self._bytes
+
+    def get(self, record_type, record_id):
+        # type: (Type[Record], int) -> Union[Record, None]
+        """
+        :param record_type:
+        :param record_id:
+        :return: The record, if it is kept. Records which were invalidated or given another id are forgotten.
+        """
+        key = (record_type, record_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            record = entry[0]
+            if not record.valid or record.id != record_id:
+                self._remove(key)
+                return None
+            self._entries.pop(key)
+            self._entries[key] = entry
+            return record
+
+    def add(self, record):
+        # type: (Record) -> Record
+        """
+        Keep a record, replacing any other object for the same record, or update the size of its downloaded file if it
+        is already kept.
+        :param record:
+        :return: The record.
+        """
+        if record.id is None or not record.valid:
+            return record
+        key = (type(record), record.id)
+        size = _local_size(record)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (record, size)
+            self._bytes += size
+            self._evict()
+        return record
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def _evict(self):
+        while self._max_records is not None and len(self._entries) > self._max_records:
+            _, (_, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+        if self._max_bytes is not None and self._bytes > self._max_bytes:
+            for key in [key for key, (_, size) in self._entries.items() if size > 0]:
+                self._remove(key)
+                if self._bytes <= self._max_bytes:
+                    break
+
+    def discard(self, record):
+        # type: (Record) -> None
+        """
+        Forget a record.
+        :param record:
+        :return:
+        """
+        with self._lock:
+            for key in [key for key, (kept, _) in self._entries.items() if kept is record]:
+                self._remove(key)
+
+    def invalidate(self, record_type=None, record_id=None):
+        # type: (Union[Type[Record], None], Union[int, None]) -> None
+        """
+        Forget records, so the next lookup creates a new object with the current state on the service.
+        :param record_type: Only forget records of this type. None for all types.
+        :param record_id: Only forget the record with this id.
+        :return:
+        """
+        with self._lock:
+            for key in list(self._entries):
+                if (record_type is None or key[0] is record_type) and (record_id is None or key[1] == record_id):
+                    self._remove(key)
+
+    def clear(self):
+        self.invalidate()
@@ -0,0 +1,220 @@
+import json
+import logging
+import re
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Tuple, Union
+
+import requests
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_ID_SEGMENT = re.compile(r'^(\d+|[0-9a-fA-F]{8}-[0-9a-fA-F-]{27}|[0-9a-fA-F]{24,})$')
+
+
+def endpoint_name(url, base_url):
+    # type: (str, str) -> str
+    """
+    The endpoint of a url, with the base url and query left out and record ids replaced by {id}, so that requests for
+    different records of one type are counted together (ex: 'collections/{id}').
+    :param url:
+    :param base_url: The url of the API.
+    :return:
+    """
+    path = url.split('?', 1)[0].split('#', 1)[0]
+    if path.startswith(base_url):
+        path = path[len(base_url):]
+    return '/'.join('{id}' if _ID_SEGMENT.match(segment) else segment for segment in path.strip('/').split('/'))
+
+
+def _content_length(headers):
+    # type: (Any) -> int
+    try:
+        return int(headers.get('Content-Length', 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+class _EndpointStats(object):
+    """
+    The counters of one endpoint and HTTP method.
+    """
+
+    def __init__(self, buckets):
+        # type: (Tuple[float, ...]) -> None
+        self.count = 0
+        self.errors = 0
+        self.retries = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.latency_sum = 0.0
+        self.buckets = buckets
+        self.bucket_counts = [0] * (len(self.buckets) + 1)  # the last is for latencies above the largest bucket
+
+    def add(self, elapsed, bytes_sent, bytes_received, retries, failed):
+        # type: (float, int, int, int, bool) -> None
+        self.count += 1
+        self.errors += 1 if failed else 0
+        self.retries += retries
+        self.bytes_sent += bytes_sent
+        self.bytes_received += bytes_received
+        self.latency_sum += elapsed
+        for i, bound in enumerate(self.buckets):
+            if elapsed <= bound:
+                self.bucket_counts[i] += 1
+                return
+        self.bucket_counts[-1] += 1
+
+    def to_dict(self):
+        # type: () -> Dict[str, Any]
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'retries': self.retries,
+            'bytes_sent': self.bytes_sent,
+            'bytes_received': self.bytes_received,
+            'latency_sum': self.latency_sum,
+            'latency_mean': self.latency_sum / self.count if self.count else 0.0,
+            'latency_buckets': [[bound, count] for bound, count in zip(list(self.buckets) + ['+Inf'],
+                                                                       self.bucket_counts)]
+        }
+
+
+class RequestStats(object):
+    """
+    Counts requests by endpoint and HTTP method: how many were made, how long they took (as a histogram), how many bytes
+    were sent and received, and how many were retried or failed. Hooks are called with the details of every request.
+    One RequestStats may be shared by several sessions.
+    """
+
+    def __init__(self, latency_buckets=DEFAULT_LATENCY_BUCKETS):
+        # type: (Iterable[float]) -> None
+        """
+        :param latency_buckets: The upper bounds (in seconds) of the buckets of the latency histograms, in increasing
+                                order.
+        """
+        self._buckets = tuple(latency_buckets)
+        self._endpoints = {}  # type: Dict[str, Dict[str, _EndpointStats]]
+        self._hooks = []  # type: List[Callable[[Dict[str, Any]], None]]
+        self._lock = threading.Lock()
+
+    def add_hook(self, hook):
+        # type: (Callable[[Dict[str, Any]], None]) -> None
+        """
+        Call hook after every request with a dictionary containing method, endpoint, url, status (None if no response
+        was received), elapsed (seconds, including retries), bytes_sent, bytes_received, retries and error (the
+        exception raised, if any). Exceptions raised by hooks are logged and do not affect the request.
+        :param hook:
+        :return:
+        """
+        with self._lock:
+            self._hooks.append(hook)
+
+    def remove_hook(self, hook):
+        # type: (Callable[[Dict[str, Any]], None]) -> None
+        with self._lock:
+            self._hooks.remove(hook)
+
+    def record(self, method, endpoint, url, elapsed, retries, response=None, error=None, streamed=False):
+        # type: (str, str, str, float, int, Union[requests.Response, None], Union[Exception, None], bool) -> None
+        """
+        Count one request.
+        :param method:
+        :param endpoint: The endpoint name, see endpoint_name.
+        :param url:
+        :param elapsed: The time from the first attempt until the response (or error) in seconds.
+        :param retries: The number of attempts after the first.
+        :param response: The final response, if any.
+        :param error: The exception raised, if the request failed without a response.
+        :param streamed: Whether the body of the response is read later. The bytes received are then taken from the
+                         Content-Length header.
+        :return:
+        """
+        bytes_sent = _content_length(response.request.headers) if response is not None else 0
+        bytes_received = 0
+        if response is not None:
+            bytes_received = _content_length(response.headers) if streamed else len(response.content)
+        failed = error is not None or (response is not None and response.status_code >= 400)
+        with self._lock:
+            stats = self._endpoints.setdefault(endpoint, {}).get(method)
+            if stats is None:
+                stats = self._endpoints[endpoint][method] = _EndpointStats(self._buckets)
+            stats.add(elapsed, bytes_sent, bytes_received, retries, failed)
+            hooks = list(self._hooks)
+        if hooks:
+            event = {
+                'method': method,
+                'endpoint': endpoint,
+                'url': url,
+                'status': response.status_code if response is not None else None,
+                'elapsed': elapsed,
+                'bytes_sent': bytes_sent,
+                'bytes_received': bytes_received,
+                'retries': retries,
+                'error': error
+            }
+            for hook in hooks:
+                try:
+                    hook(event)
+                except Exception:
+                    logging.getLogger(__name__).exception('Request hook %r failed.', hook)
+
+    def snapshot(self):
+        # type: () -> Dict[str, Dict[str, Dict[str, Any]]]
+        """
+        :return: The counters of every endpoint and method, as {endpoint: {method: counters}}.
+        """
+        with self._lock:
+            return {endpoint: {method: stats.to_dict() for method, stats in methods.items()}
+                    for endpoint, methods in self._endpoints.items()}
+
+    def reset(self):
+        """
+        Set all counters back to zero. Hooks are kept.
+        :return:
+        """
+        with self._lock:
+            self._endpoints.clear()
+
+    def to_json(self, **kwargs):
+        # type: (Any) -> str
+        """
+        :param kwargs: Passed to json.dumps
+        :return: The snapshot as JSON.
+        """
+        return json.dumps(self.snapshot(), **kwargs)
+
+    def to_prometheus(self, prefix='omics_dashboard_client'):
+        # type: (str) -> str
+        """
+        :param prefix: The prefix of the metric names.
+        :return: The counters in the Prometheus text exposition format.
+        """
+        snapshot = self.snapshot()
+        lines = []
+
+        def metric(name, kind, description, field):
+            lines.append('# HELP {}_{} {}'.format(prefix, name, description))
+            lines.append('# TYPE {}_{} {}'.format(prefix, name, kind))
+            for endpoint, methods in sorted(snapshot.items()):
+                for method, stats in sorted(methods.items()):
+                    lines.append('{}_{}{{endpoint="{}",method="{}"}} {}'.format(prefix, name, endpoint, method,
+                                                                               stats[field]))
+
+        metric('requests_total', 'counter', 'Requests made.', 'count')
+        metric('request_errors_total', 'counter', 'Requests which failed or received an error status.', 'errors')
+        metric('request_retries_total', 'counter', 'Retried attempts.', 'retries')
+        metric('request_sent_bytes_total', 'counter', 'Bytes of request bodies sent.', 'bytes_sent')
+        metric('request_received_bytes_total', 'counter', 'Bytes of response bodies received.', 'bytes_received')
+        lines.append('# HELP {}_request_duration_seconds Request latency, including retries.'.format(prefix))
+        lines.append('# TYPE {}_request_duration_seconds histogram'.format(prefix))
+        for endpoint, methods in sorted(snapshot.items()):
+            for method, stats in sorted(methods.items()):
+                labels = 'endpoint="{}",method="{}"'.format(endpoint, method)
+                cumulative = 0
+                for bound, count in stats['latency_buckets']:
+                    cumulative += count
+                    lines.append('{}_request_duration_seconds_bucket{{{},le="{}"}} {}'.format(prefix, labels, bound,
+                                                                                            cumulative))
+                lines.append('{}_request_duration_seconds_sum{{{}}} {}'.format(prefix, labels, stats['latency_sum']))
+                lines.append('{}_request_duration_seconds_count{{{}}} {}'.format(prefix, labels, stats['count']))
+        return '\n'.join(lines) + '\n'
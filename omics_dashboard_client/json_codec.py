@@ -0,0 +1,60 @@
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class JsonCodec(object):
+    """
+    Encodes request bodies and decodes response bodies for a session, with the json module of the standard library.
+    Subclass it to use another JSON library.
+    """
+    name = 'json'
+
+    def loads(self, data):
+        # type: (Union[bytes, str]) -> Any
+        """
+        :param data: A UTF-8 encoded JSON document.
+        :return:
+        """
+        return json.loads(data.decode('utf-8') if isinstance(data, bytes) else data)
+
+    def dumps(self, value):
+        # type: (Any) -> bytes
+        """
+        :param value:
+        :return: The UTF-8 encoded JSON of value.
+        """
+        return json.dumps(value).encode('utf-8')
+
+
+class OrjsonCodec(JsonCodec):
+    """
+    A JsonCodec using orjson, which decodes and encodes several times faster than the json module. Unlike the json
+    module, orjson rejects integers larger than 64 bits and dictionary keys which are not strings, and writes NaN as
+    null.
+    """
+    name = 'orjson'
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError('OrjsonCodec requires orjson. Install it with "pip install orjson".')
+
+    def loads(self, data):
+        # type: (Union[bytes, str]) -> Any
+        return orjson.loads(data)
+
+    def dumps(self, value):
+        # type: (Any) -> bytes
+        return orjson.dumps(value)
+
+
+def default_codec():
+    # type: () -> JsonCodec
+    """
+    :return: An OrjsonCodec if orjson is installed, otherwise a JsonCodec.
+    """
+    return OrjsonCodec() if orjson is not None else JsonCodec()
@@ -0,0 +1,55 @@
+import codecs
+import json
+from typing import Any, Iterable, Iterator
+
+_WHITESPACE = ' \t\n\r'
+
+
+def iter_json_array(chunks):
+    # type: (Iterable[bytes]) -> Iterator[Any]
+    """
+    Decode the elements of a JSON array as its bytes arrive, without holding the whole document in memory.
+    :param chunks: Consecutive pieces of a UTF-8 encoded JSON array.
+    :return: The elements of the array, in order.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    started = False
+    finished = False
+    chunks = iter(chunks)
+    exhausted = False
+    while not finished:
+        try:
+            buffer += text_decoder.decode(next(chunks))
+        except StopIteration:
+            buffer += text_decoder.decode(b'', final=True)
+            exhausted = True
+        position = 0
+        while True:
+            while position < len(buffer) and (buffer[position] in _WHITESPACE or (started and buffer[position] == ',')):
+                position += 1
+            if position == len(buffer):
+                break
+            if not started:
+                if buffer[position] != '[':
+                    raise ValueError('Expected a JSON array, got {!r}'.format(buffer[position:position + 20]))
+                started = True
+                position += 1
+                continue
+            if buffer[position] == ']':
+                finished = True
+                break
+            try:
+                element, end = decoder.raw_decode(buffer, position)
+            except ValueError:
+                if exhausted:
+                    raise
+                break
+            if end == len(buffer) and not exhausted:
+                break  # a number or literal at the end of the buffer may continue in the next chunk
+            yield element
+            position = end
+        buffer = buffer[position:]
+        if exhausted and not finished:
+            raise ValueError('JSON array ended unexpectedly.')
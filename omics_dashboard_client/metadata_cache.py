@@ -0,0 +1,157 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Union
+
+import requests
+
+
+class MetadataCacheEntry(object):
+    """
+    A cached response body and the validators needed to check whether it is still current.
+    """
+
+    def __init__(self, content, etag, last_modified, fetched_on):
+        # type: (bytes, Union[str, None], Union[str, None], float) -> None
+        self._content = content
+        self._etag = etag
+        self._last_modified = last_modified
+        self._fetched_on = fetched_on
+
+    @property
+    def content(self):
+        # type: () -> bytes
+        return self._content
+
+    @property
+    def fetched_on(self):
+        # type: () -> float
+        return self._fetched_on
+
+    @property
+    def validators(self):
+        # type: () -> Dict[str, str]
+        """
+        Headers which make a request conditional on the resource having changed since this entry was fetched.
+        :return:
+        """
+        headers = {}
+        if self._etag is not None:
+            headers['If-None-Match'] = self._etag
+        if self._last_modified is not None:
+            headers['If-Modified-Since'] = self._last_modified
+        return headers
+
+
+class MetadataCache(object):
+    """
+    Response bodies of metadata requests, keyed by url. When the service sent an ETag or Last-Modified header, the entry
+    is revalidated with a conditional request and only transferred again if it changed. Otherwise the entry is trusted
+    for ttl seconds. A session does not cache jobs, and when it writes a record it removes the entries of its type and
+    of the types listing it (ex: sample groups for a sample). Changes made by other clients can go unseen for ttl
+    seconds.
+    """
+
+    def __init__(self, ttl=60, max_entries=1024):
+        # type: (float, int) -> None
+        """
+        :param ttl: How long (in seconds) an entry without validators is used without asking the service.
+        :param max_entries: The maximum number of urls kept. The least recently used are removed first.
+        """
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._revalidations = 0
+        self._misses = 0
+
+    @property
+    def ttl(self):
+        # type: () -> float
+        return self._ttl
+
+    @property
+    def hits(self):
+        # type: () -> int
+        """
+        The number of lookups answered without a request.
+        :return:
+        """
+        return self._hits
+
+    @property
+    def revalidations(self):
+        # type: () -> int
+        """
+        The number of conditional requests answered with 304 Not Modified.
+        :return:
+        """
+        return self._revalidations
+
+    @property
+    def misses(self):
+        # type: () -> int
+        """
+        The number of lookups which transferred a full body.
+        :return:
+        """
+        return self._misses
+
+    def lookup(self, url):
+        # type: (str) -> Union[MetadataCacheEntry, None]
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                self._entries.pop(url)
+                self._entries[url] = entry
+            return entry
+
+    def is_fresh(self, entry):
+        # type: (MetadataCacheEntry) -> bool
+        """
+        Whether an entry can be used without asking the service.
+        :param entry:
+        :return:
+        """
+        return not entry.validators and time.time() - entry.fetched_on < self._ttl
+
+    def record_hit(self, revalidated=False):
+        # type: (bool) -> None
+        with self._lock:
+            if revalidated:
+                self._revalidations += 1
+            else:
+                self._hits += 1
+
+    def store(self, url, response):
+        # type: (str, requests.Response) -> None
+        """
+        Remember the body of a successful response.
+        :param url:
+        :param response:
+        :return:
+        """
+        entry = MetadataCacheEntry(response.content, response.headers.get('ETag'),
+                                   response.headers.get('Last-Modified'), time.time())
+        with self._lock:
+            self._misses += 1
+            self._entries.pop(url, None)
+            self._entries[url] = entry
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, url_prefix):
+        # type: (str) -> None
+        """
+        Remove all entries whose url starts with url_prefix.
+        :param url_prefix:
+        :return:
+        """
+        with self._lock:
+            for url in [url for url in self._entries if url.startswith(url_prefix)]:
+                del self._entries[url]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,165 @@
+import hashlib
+import os
+import uuid
+from typing import Any, Callable, Dict, Iterator, List, Union
+
+
+def _form_values(value):
+    # type: (Any) -> List[bytes]
+    """
+    Encode a form field value the way requests does: iterables become repeated fields and None is left out.
+    :param value:
+    :return:
+    """
+    if isinstance(value, (str, bytes)) or not hasattr(value, '__iter__'):
+        value = [value]
+    return [item if isinstance(item, bytes) else str(item).encode('utf-8') for item in value if item is not None]
+
+
+class MultipartFileEncoder(object):
+    """
+    A multipart/form-data request body containing form fields and one file. The file is read from disk in chunks while
+    the body is sent, so memory use does not depend on the size of the file. The file is only open while it is being
+    read. Pass the encoder as data= and its content_type as the Content-Type header.
+    """
+
+    def __init__(self, fields, file_field, filename, chunk_size=1048576, progress_callback=None):
+        # type: (Union[Dict[str, Any], None], str, str, int, Union[Callable[[int, int], None], None]) -> None
+        """
+        :param fields: Form fields sent before the file.
+        :param file_field: The name of the form field of the file.
+        :param filename: The path of the file to send.
+        :param chunk_size: The number of bytes read from the file at a time.
+        :param progress_callback: Called with the number of bytes sent so far and the total size of the body.
+        """
+        self._boundary = uuid.uuid4().hex
+        self._filename = filename
+        self._chunk_size = chunk_size
+        self._progress_callback = progress_callback
+        head = b''
+        for name, value in (fields or {}).items():
+            for item in _form_values(value):
+                head += self._part_header('form-data; name="{}"'.format(name)) + item + b'\r\n'
+        head += self._part_header('form-data; name="{}"; filename="{}"'.format(file_field, os.path.basename(filename)),
+                                  'application/octet-stream')
+        self._head = head
+        self._tail = '\r\n--{}--\r\n'.format(self._boundary).encode('utf-8')
+        self._file_size = os.path.getsize(filename)
+        self._length = len(self._head) + self._file_size + len(self._tail)
+        self._parts = None  # type: Union[Iterator[bytes], None]
+        self._buffer = b''
+        self._offset = 0
+        self._fp = None
+        self._bytes_read = 0
+        self._file_digest = None
+        self.rewind()
+
+    def _part_header(self, content_disposition, content_type=None):
+        # type: (str, Union[str, None]) -> bytes
+        header = '--{}\r\nContent-Disposition: {}\r\n'.format(self._boundary, content_disposition)
+        if content_type is not None:
+            header += 'Content-Type: {}\r\n'.format(content_type)
+        return (header + '\r\n').encode('utf-8')
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        while True:
+            chunk = self.read(self._chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def content_type(self):
+        # type: () -> str
+        return 'multipart/form-data; boundary={}'.format(self._boundary)
+
+    @property
+    def bytes_read(self):
+        # type: () -> int
+        """
+        The number of bytes of the body handed out so far.
+        :return:
+        """
+        return self._bytes_read
+
+    @property
+    def file_digest(self):
+        # type: () -> Union[str, None]
+        """
+        The SHA-256 hex digest of the file, once the whole body has been read.
+        :return:
+        """
+        return self._file_digest
+
+    def _iter_parts(self):
+        # type: () -> Iterator[bytes]
+        yield self._head
+        digest = hashlib.sha256()
+        fp = self._fp = open(self._filename, 'rb')
+        try:
+            while True:
+                chunk = fp.read(self._chunk_size)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                yield chunk
+        finally:
+            fp.close()
+            self._fp = None
+        self._file_digest = digest.hexdigest()
+        yield self._tail
+
+    def read(self, size=-1):
+        # type: (int) -> bytes
+        """
+        :param size: The maximum number of bytes to return. Negative to read everything that is left.
+        :return: The next bytes of the body, or b'' at the end.
+        """
+        pieces = []
+        wanted = size
+        while size < 0 or wanted > 0:
+            if self._offset >= len(self._buffer):
+                try:
+                    self._buffer = next(self._parts)
+                    self._offset = 0
+                except StopIteration:
+                    break
+                continue
+            end = len(self._buffer) if size < 0 else min(len(self._buffer), self._offset + wanted)
+            pieces.append(self._buffer[self._offset:end])
+            wanted -= end - self._offset
+            self._offset = end
+        out = b''.join(pieces)
+        self._bytes_read += len(out)
+        if out and self._progress_callback is not None:
+            self._progress_callback(self._bytes_read, self._length)
+        return out
+
+    def rewind(self):
+        """
+        Start the body again from the beginning, so the request can be retried.
+        :return:
+        """
+        self.close()
+        self._parts = self._iter_parts()
+        self._buffer = b''
+        self._offset = 0
+        self._bytes_read = 0
+        self._file_digest = None
+
+    def close(self):
+        """
+        Close the file, if it is open. The rest of the body is discarded.
+        :return:
+        """
+        if self._parts is not None:
+            self._parts.close()  # runs the finally clause of _iter_parts, which closes the file
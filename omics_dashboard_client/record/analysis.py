@@ -1,10 +1,19 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, TYPE_CHECKING
 
 from omics_dashboard_client.record.omics_record import OmicsRecord
 
+if TYPE_CHECKING:
+    from omics_dashboard_client.record.collection import Collection
+    from omics_dashboard_client.record.external_file import ExternalFile
+    from omics_dashboard_client.record.workflow import Workflow
+
 
 class Analysis(OmicsRecord):
     url_suffix = 'analyses'
+    _relationships = dict(OmicsRecord._relationships,
+                          workflows=('Workflow', 'workflow_ids'),
+                          collections=('Collection', 'collection_ids'),
+                          external_files=('ExternalFile', 'external_file_ids'))
 
     def __init__(self,
                  res_data,
@@ -22,6 +31,7 @@ class Analysis(OmicsRecord):
         self._workflow_ids = [workflow['id'] for workflow in res_data['workflows']]
         self._collection_ids = [collection['id'] for collection in res_data['collections']]
         self._external_file_ids = [external_file['id'] for external_file in res_data['external_files']]
+        self._save_state()
 
     @property
     def workflow_ids(self):
@@ -31,8 +41,9 @@ class Analysis(OmicsRecord):
     @workflow_ids.setter
     def workflow_ids(self, value):
         # type: (List[int]) -> None
-        if self.__is_write_permitted:
+        if self._is_write_permitted:
             self._workflow_ids = value
+            self._mark_changed('workflow_ids')
         else:
             raise RuntimeError('Current user cannot edit this field.')
 
@@ -40,6 +51,15 @@ class Analysis(OmicsRecord):
     def workflow_ids(self):
         raise RuntimeError('Fields cannot be deleted.')
 
+    @property
+    def workflows(self):
+        # type: () -> List[Workflow]
+        """
+        The workflows of this analysis.
+        :return:
+        """
+        return self._related('workflows')
+
     @property
     def collection_ids(self):
         # type: () -> List[int]
@@ -48,8 +68,9 @@ class Analysis(OmicsRecord):
     @collection_ids.setter
     def collection_ids(self, value):
         # type: (List[int]) -> None
-        if self.__is_write_permitted:
+        if self._is_write_permitted:
             self._collection_ids = value
+            self._mark_changed('collection_ids')
         else:
             raise RuntimeError('Current user cannot edit this field.')
 
@@ -57,6 +78,15 @@ class Analysis(OmicsRecord):
     def collection_ids(self):
         raise RuntimeError('Fields cannot be deleted.')
 
+    @property
+    def collections(self):
+        # type: () -> List[Collection]
+        """
+        The collections of this analysis.
+        :return:
+        """
+        return self._related('collections')
+
     @property
     def external_file_ids(self):
         # type: () -> List[int]
@@ -65,8 +95,9 @@ class Analysis(OmicsRecord):
     @external_file_ids.setter
     def external_file_ids(self, value):
         # type: (List[int]) -> None
-        if self.__is_write_permitted:
+        if self._is_write_permitted:
             self._external_file_ids = value
+            self._mark_changed('external_file_ids')
         else:
             raise RuntimeError('Current user cannot edit this field.')
 
@@ -74,6 +105,15 @@ class Analysis(OmicsRecord):
     def external_file_ids(self):
         raise RuntimeError('Fields cannot be deleted.')
 
+    @property
+    def external_files(self):
+        # type: () -> List[ExternalFile]
+        """
+        The external files of this analysis.
+        :return:
+        """
+        return self._related('external_files')
+
     def serialize(self):
         # type: () -> Dict[str, Any]
         out = super(Analysis, self).serialize()
@@ -89,3 +129,4 @@ class Analysis(OmicsRecord):
         self._workflow_ids = [workflow['id'] for workflow in res_data['workflows']]
         self._collection_ids = [collection['id'] for collection in res_data['collections']]
         self._external_file_ids = [external_file['id'] for external_file in res_data['external_files']]
+        self._save_state()
@@ -1,10 +1,16 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Union, TYPE_CHECKING
 
 from omics_dashboard_client.record.numeric_file_record import NumericFileRecord
 
+if TYPE_CHECKING:
+    from omics_dashboard_client.record.analysis import Analysis
+
 
 class Collection(NumericFileRecord):
     url_suffix = 'collections'
+    _relationships = dict(NumericFileRecord._relationships,
+                          analyses=('Analysis', 'analysis_ids'),
+                          parent=('Collection', 'parent_id'))
 
     def __init__(self,
                  res_data,
@@ -21,6 +27,7 @@ class Collection(NumericFileRecord):
                                          session_user_is_admin)
         self._analysis_ids = res_data['analysis_ids']
         self._parent_id = res_data['parent_id']
+        self._save_state()
 
     @property
     def id(self):
@@ -46,10 +53,11 @@ class Collection(NumericFileRecord):
         if self.valid:
             if value is None:
                 # setting value to None is equivalent to making a copy
-                self.__is_write_permitted = True
+                self._is_write_permitted = True
                 self._update_url = None
                 self._parent_id = self._id
             self._id = value
+            self._mark_changed('id')
         else:
             raise RuntimeError('Record is invalid')
 
@@ -69,8 +77,9 @@ class Collection(NumericFileRecord):
     @analysis_ids.setter
     def analysis_ids(self, value):
         # type: (List[int]) -> None
-        if self.__is_write_permitted:
+        if self._is_write_permitted:
             self._analysis_ids = value
+            self._mark_changed('analysis_ids')
         else:
             raise RuntimeError('Current user cannot edit this field.')
 
@@ -78,6 +87,15 @@ class Collection(NumericFileRecord):
     def analysis_ids(self):
         raise RuntimeError('Fields cannot be deleted.')
 
+    @property
+    def analyses(self):
+        # type: () -> List[Analysis]
+        """
+        The analyses this collection is part of.
+        :return:
+        """
+        return self._related('analyses')
+
     @property
     def parent_id(self):
         # type () -> int
@@ -91,8 +109,9 @@ class Collection(NumericFileRecord):
     def parent_id(self, value):
         # type: (int) -> None
         if self.valid:
-            if self.__is_write_permitted:
+            if self._is_write_permitted:
                 self._parent_id = value
+                self._mark_changed('parent_id')
             else:
                 raise RuntimeError('Current user cannot edit this record.')
         else:
@@ -102,6 +121,15 @@ class Collection(NumericFileRecord):
     def parent_id(self):
         raise RuntimeError('Fields cannot be deleted.')
 
+    @property
+    def parent(self):
+        # type: () -> Union[Collection, None]
+        """
+        The collection this collection was created from, if any.
+        :return:
+        """
+        return self._related('parent')
+
     def serialize(self):
         # type: () -> Dict[str, Any]
         """
@@ -119,3 +147,4 @@ class Collection(NumericFileRecord):
                                        '{}/{}'.format(base_url, Collection.url_suffix))
         self._analysis_ids = new_data['analysis_ids']
         self._parent_id = new_data['parent_id']
+        self._save_state()
@@ -1,10 +1,14 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, TYPE_CHECKING
 
 from omics_dashboard_client.record.file_record import FileRecord
 
+if TYPE_CHECKING:
+    from omics_dashboard_client.record.analysis import Analysis
+
 
 class ExternalFile(FileRecord):
     url_suffix = 'external_files'
+    _relationships = dict(FileRecord._relationships, analyses=('Analysis', 'analysis_ids'))
 
     def __init__(self,
                  res_data,
@@ -20,6 +24,7 @@ class ExternalFile(FileRecord):
                                            '{}/{}'.format(base_url, ExternalFile.url_suffix),
                                            session_user_is_admin)
         self._analysis_ids = res_data['analysis_ids']
+        self._save_state()
 
     @property
     def analysis_ids(self):
@@ -28,8 +33,9 @@ class ExternalFile(FileRecord):
     @analysis_ids.setter
     def analysis_ids(self, value):
         # type: (List[int]) -> None
-        if self.__is_write_permitted:
+        if self._is_write_permitted:
             self._analysis_ids = value
+            self._mark_changed('analysis_ids')
         else:
             raise RuntimeError('Current user cannot edit this record.')
 
@@ -37,6 +43,15 @@ class ExternalFile(FileRecord):
     def analysis_ids(self):
         raise RuntimeError('Fields cannot be deleted.')
 
+    @property
+    def analyses(self):
+        # type: () -> List[Analysis]
+        """
+        The analyses this file is part of.
+        :return:
+        """
+        return self._related('analyses')
+
     def serialize(self):
         # type: () -> Dict[str, Any]
         """
@@ -50,3 +65,4 @@ class ExternalFile(FileRecord):
     def update(self, new_data, base_url):
         super(ExternalFile, self).update(new_data, '{}/{}'.format(base_url, ExternalFile.url_suffix))
         self._analysis_ids = new_data['analysis_ids']
+        self._save_state()
@@ -0,0 +1,117 @@
+import os
+import shutil
+import tempfile
+import threading
+from typing import Callable, Dict, Union
+
+# The temporary directories created by this process for downloaded files, with the number of records holding each
+_references = {}  # type: Dict[str, int]
+# Called instead of removing a directory when it is no longer held, with the path and whether it was forgotten
+_release_hooks = {}  # type: Dict[str, Callable[[str, bool], None]]
+_references_pid = os.getpid()
+_lock = threading.Lock()
+
+
+def _current_references():
+    # type: () -> Dict[str, int]
+    """
+    The references of this process. A forked process starts with none, so the directories of its parent are never
+    removed by it.
+    :return:
+    """
+    global _references_pid
+    if _references_pid != os.getpid():
+        _references.clear()
+        _release_hooks.clear()
+        _references_pid = os.getpid()
+    return _references
+
+
+def create_temp_dir(parent=None, on_release=None):
+    # type: (Union[str, None], Union[Callable[[str, bool], None], None]) -> str
+    """
+    Create a temporary directory for downloaded files, held once. It is removed when it is released as many times as it
+    was held.
+    :param parent: The directory to create it in. Defaults to the temporary directory of the system.
+    :param on_release: Called with the path and False instead of removing the directory, or with the path and True when
+                       it is forgotten.
+    :return: The path of the directory.
+    """
+    path = tempfile.mkdtemp(dir=parent)
+    register_temp_dir(path, on_release)
+    return path
+
+
+def register_temp_dir(path, on_release=None):
+    # type: (str, Union[Callable[[str, bool], None], None]) -> None
+    """
+    Hold an existing directory once, as if it was created by create_temp_dir.
+    :param path:
+    :param on_release: See create_temp_dir.
+    :return:
+    """
+    with _lock:
+        _current_references()[path] = 1
+        if on_release is not None:
+            _release_hooks[path] = on_release
+
+
+def retain_temp_dir(path):
+    # type: (Union[str, None]) -> bool
+    """
+    Hold a directory created by create_temp_dir once more.
+    :param path:
+    :return: Whether the directory is held. False if it was not created by this process or was already removed.
+    """
+    with _lock:
+        references = _current_references()
+        if path is None or path not in references:
+            return False
+        references[path] += 1
+        return True
+
+
+def release_temp_dir(path):
+    # type: (Union[str, None]) -> None
+    """
+    Let go of a directory created by create_temp_dir, and remove it if nothing else holds it.
+    :param path:
+    :return:
+    """
+    with _lock:
+        references = _current_references()
+        if path is None or path not in references:
+            return
+        references[path] -= 1
+        if references[path] > 0:
+            return
+        del references[path]
+        on_release = _release_hooks.pop(path, None)
+    if on_release is not None:
+        on_release(path, False)
+    elif os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def forget_temp_dir(path):
+    # type: (Union[str, None]) -> None
+    """
+    Stop tracking a directory created by create_temp_dir, so that it is never removed.
+    :param path:
+    :return:
+    """
+    with _lock:
+        _current_references().pop(path, None)
+        on_release = _release_hooks.pop(path, None)
+    if on_release is not None:
+        on_release(path, True)
+
+
+def temp_dir_references(path):
+    # type: (Union[str, None]) -> int
+    """
+    :param path:
+    :return: How many times a directory created by create_temp_dir is held in this process.
+    """
+    with _lock:
+        return _current_references().get(path, 0)
@@ -1,14 +1,30 @@
+import hashlib
 import os
-import shutil
-import tempfile
 import warnings
-from typing import Dict, Any
+from typing import Dict, Any, Union
 
 import h5py
 
+from omics_dashboard_client.record.file_ownership import create_temp_dir, forget_temp_dir, release_temp_dir, \
+    retain_temp_dir, temp_dir_references
 from omics_dashboard_client.record.omics_record import OmicsRecord
 
 
+def file_digest(filename, chunk_size=1048576):
+    # type: (str, int) -> str
+    """
+    Get the SHA-256 digest of a file.
+    :param filename:
+    :param chunk_size: The number of bytes read at a time.
+    :return: The hex digest.
+    """
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as fp:
+        for chunk in iter(lambda: fp.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
 class FileRecord(OmicsRecord):
     def __init__(self,
                  res_data,
@@ -30,10 +46,57 @@ class FileRecord(OmicsRecord):
         self._file_type = res_data['file_type']
         self._file_info = res_data['file_info']
         self._temp_dir = None
+        self._file_snapshot = None  # (filename, size, mtime, digest) of the local file when it matched the service
 
     def __del__(self):
-        if self._temp_dir is not None and os.path.isdir(self._temp_dir):
-            shutil.rmtree(self._temp_dir)
+        release_temp_dir(getattr(self, '_temp_dir', None))  # not set if __init__ failed
+
+    def __getstate__(self):
+        state = super(FileRecord, self).__getstate__()
+        state['_temp_dir_pid'] = os.getpid()
+        return state
+
+    def __setstate__(self, state):
+        state = dict(state)
+        pid = state.pop('_temp_dir_pid', None)
+        super(FileRecord, self).__setstate__(state)
+        # A copy made in the same process shares the downloaded file and removes it with the last of its holders. A copy
+        # made in another process (ex: sent to a process pool) only refers to the file by its path and never removes it.
+        if pid != os.getpid() or not retain_temp_dir(self._temp_dir):
+            self._temp_dir = None
+
+    @property
+    def owns_file(self):
+        # type: () -> bool
+        """
+        Whether the downloaded file of this record is removed when this record (and every copy of it sharing the file in
+        this process) is gone. Records unpickled in another process refer to the file without owning it.
+        :return:
+        """
+        return self._local_filename is not None and os.path.dirname(self._local_filename) == self._temp_dir \
+            and temp_dir_references(self._temp_dir) > 0
+
+    def detach_file(self):
+        # type: () -> Union[str, None]
+        """
+        Stop owning the downloaded file, so that it is kept on disk when this record and its copies are gone. Removing
+        it is then up to you.
+        :return: The filename of the downloaded file.
+        """
+        forget_temp_dir(self._temp_dir)
+        self._temp_dir = None
+        return self._local_filename
+
+    def release_file(self):
+        """
+        Let go of the downloaded file now instead of when this record is gone. It is removed if no copy of this record
+        in this process holds it.
+        :return:
+        """
+        temp_dir, self._temp_dir = self._temp_dir, None
+        if self._local_filename is not None and os.path.dirname(self._local_filename) == temp_dir:
+            self._local_filename = None
+        release_temp_dir(temp_dir)
 
     @property
     def temp_dir(self):
@@ -168,13 +231,79 @@ class FileRecord(OmicsRecord):
         Associate this record with a file on disk.
         :return: The filename
         """
-        if self._temp_dir is None or not os.path.isdir(self._temp_dir):
-            self._temp_dir = tempfile.mkdtemp()
-        if self._local_filename is not None and os.path.isfile(self._local_filename):  # delete existing file
-            os.remove(self._local_filename)
-        self._local_filename = os.path.join(self._temp_dir, os.path.basename(self._filename))
-        with open(self._local_filename, 'wb') as fp:
+        filename = self.prepare_download()
+        with open(filename, 'wb') as fp:
             fp.write(content)
+        self.finish_download(filename, hashlib.sha256(content).hexdigest())
+
+    def prepare_download(self, temp_dir=None):
+        # type: (Union[str, None]) -> str
+        """
+        Get the path a download of the file of this record should be written to. A previous download is removed if this
+        record is its only owner.
+        :param temp_dir: A directory made with file_ownership.create_temp_dir to download into instead of the directory
+                         of this record. The hold on it is handed over to this record.
+        :return: The filename
+        """
+        if temp_dir is not None:
+            self.release_file()
+            self._local_filename = None
+            self._temp_dir = temp_dir
+            return os.path.join(self._temp_dir, os.path.basename(self._filename))
+        if self._temp_dir is None or temp_dir_references(self._temp_dir) != 1 or not os.path.isdir(self._temp_dir):
+            # a directory shared with copies of this record, or not owned by it, is left to its other holders
+            release_temp_dir(self._temp_dir)
+            self._temp_dir = create_temp_dir()
+        if self._local_filename is not None and os.path.dirname(self._local_filename) == self._temp_dir \
+                and os.path.isfile(self._local_filename):  # delete existing file
+            os.remove(self._local_filename)
+        self._local_filename = None
+        return os.path.join(self._temp_dir, os.path.basename(self._filename))
+
+    def finish_download(self, filename, digest=None):
+        # type: (str, Union[str, None]) -> None
+        """
+        Associate this record with a file written to the path returned by prepare_download.
+        :param filename:
+        :param digest: The SHA-256 hex digest of the file, if it was computed while writing it.
+        :return:
+        """
+        self._local_filename = filename
+        self.snapshot_file(digest)
+
+    def snapshot_file(self, digest=None):
+        # type: (Union[str, None]) -> None
+        """
+        Remember the state of the local file as being identical to the file on the Omics Dashboard service. Called after
+        the file is downloaded or uploaded.
+        :param digest: The SHA-256 hex digest of the file. Computed if not given.
+        :return:
+        """
+        stat = os.stat(self._local_filename)
+        self._file_snapshot = (self._local_filename, stat.st_size, stat.st_mtime,
+                               digest if digest is not None else file_digest(self._local_filename))
+
+    def file_changed(self):
+        # type: () -> bool
+        """
+        Whether the local file may differ from the file on the Omics Dashboard service. The file is only hashed if its
+        size or modification time changed since it was downloaded or uploaded. A file that was not downloaded or
+        uploaded through a session (e.g. one chosen with select_local_file) always counts as changed.
+        :return:
+        """
+        if self._local_filename is None:
+            return False
+        if self._file_snapshot is None or self._file_snapshot[0] != self._local_filename \
+                or not os.path.isfile(self._local_filename):
+            return True
+        _, size, mtime, digest = self._file_snapshot
+        stat = os.stat(self._local_filename)
+        if stat.st_size == size and stat.st_mtime == mtime:
+            return False
+        if stat.st_size != size or file_digest(self._local_filename) != digest:
+            return True
+        self._file_snapshot = (self._local_filename, stat.st_size, stat.st_mtime, digest)
+        return False
 
     def update(self, new_data, base_url):
         # type: (Dict[str, Any], str) -> None
@@ -1,30 +1,50 @@
 from datetime import datetime
 
-from typing import Dict, Any
+from typing import Dict, Any, Union, TYPE_CHECKING
 
 from omics_dashboard_client.record.record import Record
 
+if TYPE_CHECKING:
+    from omics_dashboard_client.record.user import User
+    from omics_dashboard_client.record.user_group import UserGroup
+
+
+def _parse_time(value):
+    # type: (Union[str, None]) -> Union[datetime, None]
+    return datetime.fromisoformat(value) if value else None
+
+
+def _format_date(value):
+    # type: (Union[datetime, None]) -> Union[str, None]
+    return value.strftime('%Y-%m-%dT%H:%M:%S') if value is not None else None
+
 
 class Job(Record):
     url_suffix = 'jobs'
+    _relationships = dict(Record._relationships,
+                          owner=('User', 'owner_id'),
+                          user_group=('UserGroup', 'user_group_id'))
+    finished_statuses = ('Succeeded', 'Failed', 'Aborted')
 
     def __init__(self,
                  res_data,
-                 base_url):
-        # type: (Dict[str, Any], str) -> None
+                 base_url,
+                 session_user_is_admin=False):
+        # type: (Dict[str, Any], str, bool) -> None
         """
         :param res_data: The dictionary received as JSON from the server.
         :param base_url: The url of service
+        :param session_user_is_admin: Unused. Jobs are not editable.
         """
-        res_data['created_on'] = res_data['submission'] if 'submission' in res_data else None
-        res_data['updated_on'] = res_data['end'] if 'end' in res_data else None
+        res_data['created_on'] = _format_date(_parse_time(res_data.get('submission')))
+        res_data['updated_on'] = _format_date(_parse_time(res_data.get('end')))
         super(Job, self).__init__(res_data, '{}/{}'.format(base_url, Job.url_suffix))
         self._owner_id = res_data['owner_id']
         self._user_group_id = res_data['user_group_id']
         self._type = res_data['type']
-        self._submission = datetime.fromisoformat(res_data['submission'])
-        self._start = datetime.fromisoformat(res_data['start'])
-        self._end = datetime.fromisoformat(res_data['end'])
+        self._submission = _parse_time(res_data['submission'])
+        self._start = _parse_time(res_data['start'])
+        self._end = _parse_time(res_data['end'])
         self._status = res_data['status']
         self._logs = res_data['logs']
 
@@ -45,6 +65,15 @@ class Job(Record):
     def owner_id(self):
         raise RuntimeError('Job metadata is not editable.')
 
+    @property
+    def owner(self):
+        # type: () -> Union[User, None]
+        """
+        The user who submitted this job.
+        :return:
+        """
+        return self._related('owner')
+
     @property
     def user_group_id(self):
         # type: () -> int
@@ -62,6 +91,15 @@ class Job(Record):
     def user_group_id(self):
         raise RuntimeError('Job metadata is not editable.')
 
+    @property
+    def user_group(self):
+        # type: () -> Union[UserGroup, None]
+        """
+        The user group of this job.
+        :return:
+        """
+        return self._related('user_group')
+
     @property
     def type(self):
         # type: () -> str
@@ -164,6 +202,15 @@ class Job(Record):
     def logs(self):
         raise RuntimeError('Job metadata is not editable')
 
+    @property
+    def finished(self):
+        # type: () -> bool
+        """
+        Whether the job has stopped running on the job server (see finished_statuses).
+        :return:
+        """
+        return self._status in Job.finished_statuses
+
     def serialize(self):
         # type: () -> Dict[str, Any]
         """
@@ -176,20 +223,22 @@ class Job(Record):
             'user_group_id': self._user_group_id,
             'type': self._type,
             'submission': self._submission,
-            'start': self._start.isoformat(),
-            'end': self._end.isoformat(),
+            'start': self._start.isoformat() if self._start is not None else None,
+            'end': self._end.isoformat() if self._end is not None else None,
             'status': self._status,
             'logs': self._logs
         })
         return out
 
     def update(self, new_data, base_url):
+        new_data['created_on'] = _format_date(_parse_time(new_data.get('submission')))
+        new_data['updated_on'] = _format_date(_parse_time(new_data.get('end')))
         super(Job, self).update(new_data, '{}/{}'.format(base_url, Job.url_suffix))
         self._owner_id = new_data['owner_id']
         self._user_group_id = new_data['user_group_id']
         self._type = new_data['type']
-        self._submission = datetime.fromisoformat(new_data['submission'])
-        self._start = datetime.fromisoformat(new_data['start'])
-        self._end = datetime.fromisoformat(new_data['end'])
+        self._submission = _parse_time(new_data['submission'])
+        self._start = _parse_time(new_data['start'])
+        self._end = _parse_time(new_data['end'])
         self._status = new_data['status']
         self._logs = new_data['logs']
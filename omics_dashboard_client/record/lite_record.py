@@ -0,0 +1,246 @@
+from typing import Any, Callable, Dict, List, Type, Union
+
+from omics_dashboard_client.record.analysis import Analysis
+from omics_dashboard_client.record.collection import Collection
+from omics_dashboard_client.record.external_file import ExternalFile
+from omics_dashboard_client.record.job import Job, _parse_time
+from omics_dashboard_client.record.record import Record, _parse_date
+from omics_dashboard_client.record.sample import Sample
+from omics_dashboard_client.record.sample_group import SampleGroup
+from omics_dashboard_client.record.user import User
+from omics_dashboard_client.record.user_group import UserGroup
+from omics_dashboard_client.record.workflow import Workflow
+from omics_dashboard_client.record.workflow_module import WorkflowModule
+
+
+def _ids(value):
+    # type: (Union[List[Dict[str, Any]], None]) -> Union[List[Any], None]
+    return [item['id'] for item in value] if value is not None else None
+
+
+class _Field(object):
+    """
+    A read-only field of a lite record, read from the JSON of the record each time it is accessed.
+    """
+
+    def __init__(self, key):
+        # type: (str) -> None
+        self._key = key
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        return instance._data.get(self._key)
+
+    def __set__(self, instance, value):
+        raise RuntimeError('Lite records are read-only. Use Session.records_from_lite to get editable records.')
+
+    def __delete__(self, instance):
+        raise RuntimeError('Fields cannot be deleted.')
+
+
+class _ParsedField(_Field):
+    """
+    A read-only field of a lite record which is parsed from the JSON of the record on first access and kept in a slot.
+    """
+
+    def __init__(self, key, slot, parse):
+        # type: (str, str, Callable[[Any], Any]) -> None
+        super(_ParsedField, self).__init__(key)
+        self._slot = slot
+        self._parse = parse
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        try:
+            return getattr(instance, self._slot)
+        except AttributeError:
+            value = self._parse(instance._data.get(self._key))
+            setattr(instance, self._slot, value)
+            return value
+
+
+class LiteRecord(object):
+    """
+    A read-only view of a record as received from the service. Only the JSON of the record is kept, and fields which
+    need parsing (dates, lists of linked records) are parsed when first accessed, so listing many records this way is
+    much faster and takes much less memory than making Record objects. Lite records have no file, cannot be changed and
+    do not look up linked records. Use Session.records_from_lite to get the full records.
+    """
+    __slots__ = ('_data', '_base_url', '_created_on', '_updated_on')
+    record_type = Record  # type: Type[Record]
+
+    def __init__(self, res_data, base_url):
+        # type: (Dict[str, Any], str) -> None
+        """
+        :param res_data: The dictionary received as JSON from the server. It is kept, not copied.
+        :param base_url: The url of the API.
+        """
+        self._data = res_data
+        self._base_url = base_url
+
+    def __repr__(self):
+        return '<{} {}>'.format(type(self).__name__, self.id)
+
+    id = _Field('id')
+    created_on = _ParsedField('created_on', '_created_on', _parse_date)
+    updated_on = _ParsedField('updated_on', '_updated_on', _parse_date)
+
+    @property
+    def raw(self):
+        # type: () -> Dict[str, Any]
+        """
+        The dictionary received as JSON from the server. It should not be changed.
+        :return:
+        """
+        return self._data
+
+    @property
+    def base_url(self):
+        # type: () -> str
+        return self._base_url
+
+
+class LiteOmicsRecord(LiteRecord):
+    __slots__ = ()
+    name = _Field('name')
+    description = _Field('description')
+    creator_id = _Field('creator_id')
+    owner_id = _Field('owner_id')
+    last_editor_id = _Field('last_editor_id')
+    group_can_read = _Field('group_can_read')
+    group_can_write = _Field('group_can_write')
+    all_can_read = _Field('all_can_read')
+    all_can_write = _Field('all_can_write')
+    user_group_id = _Field('user_group_id')
+    is_write_permitted = _Field('is_write_permitted')
+
+
+class LiteFileRecord(LiteOmicsRecord):
+    __slots__ = ()
+    filename = _Field('filename')
+    file_type = _Field('file_type')
+    file_info = _Field('file_info')
+
+
+class LiteCollection(LiteFileRecord):
+    __slots__ = ()
+    record_type = Collection
+    analysis_ids = _Field('analysis_ids')
+    parent_id = _Field('parent_id')
+
+
+class LiteSample(LiteFileRecord):
+    __slots__ = ()
+    record_type = Sample
+    sample_group_ids = _Field('sample_group_ids')
+
+
+class LiteExternalFile(LiteFileRecord):
+    __slots__ = ()
+    record_type = ExternalFile
+    analysis_ids = _Field('analysis_ids')
+
+
+class LiteWorkflow(LiteFileRecord):
+    __slots__ = ()
+    record_type = Workflow
+    workflow_language = _Field('workflow_language')
+    workflow_definition = _Field('workflow_definition')
+    analysis_ids = _Field('analysis_ids')
+
+
+class LiteAnalysis(LiteOmicsRecord):
+    __slots__ = ('_workflow_ids', '_collection_ids', '_external_file_ids')
+    record_type = Analysis
+    workflow_ids = _ParsedField('workflows', '_workflow_ids', _ids)
+    collection_ids = _ParsedField('collections', '_collection_ids', _ids)
+    external_file_ids = _ParsedField('external_files', '_external_file_ids', _ids)
+
+
+class LiteSampleGroup(LiteOmicsRecord):
+    __slots__ = ('_sample_ids',)
+    record_type = SampleGroup
+    sample_ids = _ParsedField('samples', '_sample_ids', _ids)
+    upload_job_id = _Field('upload_job_id')
+
+
+class LiteUser(LiteRecord):
+    __slots__ = ()
+    record_type = User
+    email = _Field('email')
+    name = _Field('name')
+    admin = _Field('admin')
+    active = _Field('active')
+    primary_user_group_id = _Field('primary_user_group_id')
+    group_ids = _Field('group_ids')
+    admin_group_ids = _Field('admin_group_ids')
+    is_write_permitted = _Field('is_write_permitted')
+
+
+class LiteUserGroup(LiteRecord):
+    __slots__ = ('_member_ids', '_admin_ids')
+    record_type = UserGroup
+    creator_id = _Field('creator_id')
+    name = _Field('name')
+    description = _Field('description')
+    member_ids = _ParsedField('members', '_member_ids', _ids)
+    admin_ids = _ParsedField('admins', '_admin_ids', _ids)
+    is_write_permitted = _Field('is_write_permitted')
+
+
+class LiteJob(LiteRecord):
+    __slots__ = ('_submission', '_start', '_end')
+    record_type = Job
+    created_on = _ParsedField('submission', '_created_on', _parse_time)
+    updated_on = _ParsedField('end', '_updated_on', _parse_time)
+    owner_id = _Field('owner_id')
+    user_group_id = _Field('user_group_id')
+    type = _Field('type')
+    submission = _ParsedField('submission', '_submission', _parse_time)
+    start = _ParsedField('start', '_start', _parse_time)
+    end = _ParsedField('end', '_end', _parse_time)
+    status = _Field('status')
+    logs = _Field('logs')
+
+
+class LiteWorkflowModule(LiteRecord):
+    __slots__ = ()
+    record_type = WorkflowModule
+    path = _Field('path')
+    label = _Field('label')
+    description = _Field('description')
+    package = _Field('package')
+    package_description = _Field('package_description')
+    subpackage = _Field('subpackage')
+    subpackage_description = _Field('subpackage_description')
+    tool_definition = _Field('tool_definition')
+
+
+def lite_record_type(record_type):
+    # type: (Type[Record]) -> Type[LiteRecord]
+    """
+    Find the lite record type of a record type.
+    :param record_type: A record type (ex: Sample).
+    :return:
+    """
+    pending = [LiteRecord]
+    while pending:
+        lite_type = pending.pop()
+        if lite_type.record_type is record_type and lite_type is not LiteRecord:
+            return lite_type
+        pending.extend(lite_type.__subclasses__())
+    raise ValueError('There is no lite record type for {}.'.format(record_type.__name__))
+
+
+def lite_record_fields(lite_type):
+    # type: (Type[LiteRecord]) -> List[str]
+    """
+    The fields of the JSON of a record read by a lite record type. They are the fields records of its type are made
+    from.
+    :param lite_type: A lite record type (ex: LiteSample).
+    :return:
+    """
+    return sorted(set(getattr(lite_type, name)._key for name in dir(lite_type)
+                      if isinstance(getattr(lite_type, name, None), _Field)))
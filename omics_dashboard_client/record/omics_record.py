@@ -1,9 +1,19 @@
-from typing import Dict, Any, Union
+import copy
+from typing import Dict, Any, Union, FrozenSet, TYPE_CHECKING
 
 from omics_dashboard_client.record.record import Record
 
+if TYPE_CHECKING:
+    from omics_dashboard_client.record.user import User
+    from omics_dashboard_client.record.user_group import UserGroup
+
 
 class OmicsRecord(Record):
+    _relationships = dict(Record._relationships,
+                          creator=('User', 'creator_id'),
+                          owner=('User', 'owner_id'),
+                          last_editor=('User', 'last_editor_id'),
+                          user_group=('UserGroup', 'user_group_id'))
     def __init__(self,
                  res_data,
                  base_url,
@@ -25,8 +35,10 @@ class OmicsRecord(Record):
         self._all_can_read = res_data['all_can_read']
         self._all_can_write = res_data['all_can_write']
         self._user_group_id = res_data['user_group_id']
-        self.__is_write_permitted = True if self.id is None or session_user_is_admin else res_data['is_write_permitted'] if 'is_write_permitted' in res_data else False
-        self.__session_user_is_admin = session_user_is_admin
+        self._is_write_permitted = True if self.id is None or session_user_is_admin else res_data['is_write_permitted'] if 'is_write_permitted' in res_data else False
+        self._session_user_is_admin = session_user_is_admin
+        self._changed_fields = set()
+        self._saved_state = None  # type: Union[Dict[str, Any], None]
 
     @property
     def id(self):
@@ -51,9 +63,10 @@ class OmicsRecord(Record):
         """
         if self.valid:
             self._id = value
+            self._mark_changed('id')
             if value is None:
                 # setting value to None is equivalent to making a copy
-                self.__is_write_permitted = True
+                self._is_write_permitted = True
                 self._update_url = None
 
     @property
@@ -70,8 +83,9 @@ class OmicsRecord(Record):
         # type: (str) -> None
         if not self.valid:
             raise RuntimeError('Record has been invalidated!')
-        if self.__is_write_permitted:
+        if self._is_write_permitted:
             self._name = value
+            self._mark_changed('name')
         else:
             raise RuntimeError('Current user cannot edit this field.')
 
@@ -93,8 +107,9 @@ class OmicsRecord(Record):
         # type: (str) -> None
         if not self.valid:
             raise RuntimeError('Record has been invalidated!')
-        if self.__is_write_permitted:
+        if self._is_write_permitted:
             self._description = value
+            self._mark_changed('description')
         else:
             raise RuntimeError('Current user cannot edit this field.')
 
@@ -114,8 +129,9 @@ class OmicsRecord(Record):
     @creator_id.setter
     def creator_id(self, value):
         # type: (str) -> None
-        if self.__session_user_is_admin:
+        if self._session_user_is_admin:
             self._creator_id = value
+            self._mark_changed('creator_id')
         else:
             raise RuntimeError('Only admins can edit this record.')
 
@@ -123,6 +139,15 @@ class OmicsRecord(Record):
     def creator_id(self):
         raise RuntimeError('Fields cannot be deleted.')
 
+    @property
+    def creator(self):
+        # type: () -> Union[User, None]
+        """
+        The user who created the record.
+        :return:
+        """
+        return self._related('creator')
+
     @property
     def owner_id(self):
         # type: () -> int
@@ -135,8 +160,9 @@ class OmicsRecord(Record):
     @owner_id.setter
     def owner_id(self, value):
         # type: (int) -> None
-        if self.__session_user_is_admin:
+        if self._session_user_is_admin:
             self._owner_id = value
+            self._mark_changed('owner_id')
         else:
             raise RuntimeError('Only admins can edit this record.')
 
@@ -144,6 +170,15 @@ class OmicsRecord(Record):
     def owner_id(self):
         raise RuntimeError('Fields cannot be deleted.')
 
+    @property
+    def owner(self):
+        # type: () -> Union[User, None]
+        """
+        The user who owns the record.
+        :return:
+        """
+        return self._related('owner')
+
     @property
     def last_editor_id(self):
         # type: () -> int
@@ -156,8 +191,9 @@ class OmicsRecord(Record):
     @last_editor_id.setter
     def last_editor_id(self, value):
         # type: (int) -> None
-        if self.__session_user_is_admin:
+        if self._session_user_is_admin:
             self._last_editor_id = value
+            self._mark_changed('last_editor_id')
         else:
             raise RuntimeError('Only admins can edit this record.')
 
@@ -165,6 +201,15 @@ class OmicsRecord(Record):
     def last_editor_id(self):
         raise RuntimeError('Fields cannot be deleted.')
 
+    @property
+    def last_editor(self):
+        # type: () -> Union[User, None]
+        """
+        The user who last edited the record.
+        :return:
+        """
+        return self._related('last_editor')
+
     @property
     def group_can_read(self):
         # type: () -> bool
@@ -177,8 +222,9 @@ class OmicsRecord(Record):
     @group_can_read.setter
     def group_can_read(self, value):
         # type: (bool) -> None
-        if self.__is_write_permitted:
+        if self._is_write_permitted:
             self._group_can_read = value
+            self._mark_changed('group_can_read')
         else:
             raise RuntimeError('Current user cannot edit this field.')
 
@@ -198,8 +244,9 @@ class OmicsRecord(Record):
     @group_can_write.setter
     def group_can_write(self, value):
         # type: (bool) -> None
-        if self.__is_write_permitted:
+        if self._is_write_permitted:
             self._group_can_write = value
+            self._mark_changed('group_can_write')
         else:
             raise RuntimeError('Current user cannot edit this field.')
 
@@ -219,8 +266,9 @@ class OmicsRecord(Record):
     @all_can_read.setter
     def all_can_read(self, value):
         # type: (bool) -> None
-        if self.__is_write_permitted:
+        if self._is_write_permitted:
             self._all_can_read = value
+            self._mark_changed('all_can_read')
         else:
             raise RuntimeError('Current user cannot edit this field.')
 
@@ -240,8 +288,9 @@ class OmicsRecord(Record):
     @all_can_write.setter
     def all_can_write(self, value):
         # type: (bool) -> None
-        if self.__is_write_permitted:
+        if self._is_write_permitted:
             self._all_can_write = value
+            self._mark_changed('all_can_write')
         else:
             raise RuntimeError('Current user cannot edit this field.')
 
@@ -261,8 +310,9 @@ class OmicsRecord(Record):
     @user_group_id.setter
     def user_group_id(self, value):
         # type: (int) -> None
-        if self.__is_write_permitted:
+        if self._is_write_permitted:
             self._user_group_id = value
+            self._mark_changed('user_group_id')
         else:
             raise RuntimeError('Current user cannot edit this field.')
 
@@ -270,6 +320,52 @@ class OmicsRecord(Record):
     def user_group_id(self):
         raise RuntimeError('Fields cannot be deleted.')
 
+    @property
+    def user_group(self):
+        # type: () -> Union[UserGroup, None]
+        """
+        The user group the record belongs to.
+        :return:
+        """
+        return self._related('user_group')
+
+    @property
+    def changed_fields(self):
+        # type: () -> FrozenSet[str]
+        """
+        The fields which were set or changed in place (ex: analysis.collection_ids.append(5)) since this record was
+        retrieved from or last saved to the Omics Dashboard service.
+        :return:
+        """
+        changed = set(self._changed_fields)
+        saved = self._saved_state
+        for key, value in self.serialize().items():
+            if saved is None or key not in saved or saved[key] != value:
+                changed.add(key)
+        return frozenset(changed)
+
+    def _mark_changed(self, field):
+        # type: (str) -> None
+        self._changed_fields.add(field)
+
+    def _save_state(self):
+        """
+        Remember the fields as received from the service, to find the fields changed since. Lists and dictionaries are
+        copied, since they can be changed in place.
+        :return:
+        """
+        self._saved_state = {key: copy.deepcopy(value) if isinstance(value, (list, dict)) else value
+                             for key, value in self.serialize().items()}
+
+    def serialize_changes(self):
+        # type: () -> Dict[str, Any]
+        """
+        Get a dictionary representation of the id of this record and the fields in changed_fields.
+        :return:
+        """
+        changed = self.changed_fields
+        return {key: value for key, value in self.serialize().items() if key == 'id' or key in changed}
+
     def serialize(self):
         # type: () -> Dict[str, Any]
         """
@@ -301,5 +397,7 @@ class OmicsRecord(Record):
         self._all_can_read = new_data['all_can_read']
         self._all_can_write = new_data['all_can_write']
         self._user_group_id = new_data['user_group_id']
-        self.__is_write_permitted = True if self.id is None or self.__session_user_is_admin else new_data[
+        self._is_write_permitted = True if self.id is None or self._session_user_is_admin else new_data[
             'is_write_permitted'] if 'is_write_permitted' in new_data else False
+        self._changed_fields = set()
+        self._saved_state = None
@@ -1,9 +1,33 @@
 from datetime import datetime
 
-from typing import Dict, Any, Union
+from typing import Dict, Any, List, Tuple, Type, Union
+
+
+def _parse_date(value):
+    # type: (Union[str, None]) -> Union[datetime, None]
+    return datetime.strptime(value, '%Y-%m-%dT%H:%M:%S') if value is not None else None
+
+
+def record_type_named(name):
+    # type: (str) -> Type[Record]
+    """
+    Find a record type by its class name.
+    :param name: The name of a subclass of Record (ex: 'Collection').
+    :return:
+    """
+    pending = [Record]
+    while pending:
+        record_type = pending.pop()
+        if record_type.__name__ == name:
+            return record_type
+        pending.extend(record_type.__subclasses__())
+    raise ValueError('There is no record type {}.'.format(name))
 
 
 class Record(object):
+    # The records this type links to, by accessor name: (name of the record type, field holding the id or ids)
+    _relationships = {}  # type: Dict[str, Tuple[str, str]]
+
     def __init__(self, res_data, base_url):
         # type: (Dict[str, Any], str) -> None
         """
@@ -12,12 +36,24 @@ class Record(object):
         """
         self._original_id = res_data['id'] if 'id' in res_data else None
         self._id = res_data['id'] if 'id' in res_data else None
-        self._created_on = datetime.strptime(res_data['created_on'], '%Y-%m-%dT%H:%M:%S')
-        self._updated_on = datetime.strptime(res_data['updated_on'], '%Y-%m-%dT%H:%M:%S')
+        self._created_on = _parse_date(res_data['created_on'])
+        self._updated_on = _parse_date(res_data['updated_on'])
         self._base_url = base_url
         self._update_url = '{}/{}'.format(base_url, self.id) if self.id is not None else None
         self._create_url = base_url
         self._valid = True
+        self._session = None  # the session which retrieved this record, used to look up linked records
+        self._cohort = None  # the records retrieved together with this one, whose links are looked up together
+        self._related_records = {}  # type: Dict[str, Tuple[Any, Any]]
+
+    def __getstate__(self):
+        # the session and the linked records stay behind, so records can be sent to other processes
+        state = self.__dict__.copy()
+        state.update(_session=None, _cohort=None, _related_records={})
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
 
     @property
     def original_id(self):
@@ -161,12 +197,13 @@ class Record(object):
         """
         self._original_id = new_data['id'] if 'id' in new_data else None
         self._id = new_data['id'] if 'id' in new_data else None
-        self._created_on = datetime.strptime(new_data['created_on'], '%Y-%m-%dT%H:%M:%S')
-        self._updated_on = datetime.strptime(new_data['updated_on'], '%Y-%m-%dT%H:%M:%S')
+        self._created_on = _parse_date(new_data['created_on'])
+        self._updated_on = _parse_date(new_data['updated_on'])
         self._base_url = base_url
         self._update_url = '{}/{}'.format(base_url, self.id) if self.id is not None else None
         self._create_url = '{}/create'.format(base_url)
         self._valid = True
+        self._related_records = {}
 
     def invalidate(self):
         """
@@ -175,3 +212,45 @@ class Record(object):
         :return:
         """
         self._valid = False
+
+    def _related(self, name):
+        # type: (str) -> Union[Record, List[Record], None]
+        """
+        Get linked records, looking them up through the session on first access. The lookup is made for this record
+        and all the records retrieved together with it at once, so walking the links of many records costs one
+        concurrent fetch instead of one request per record. The result is kept until this record is updated or the
+        field holding the ids changes.
+        :param name: The name of the relationship.
+        :return: A list of records, or one record (or None) when the field holds a single id.
+        """
+        related = self._related_if_current(name)
+        if related is not None:
+            return related[0]
+        if self._session is None:
+            raise RuntimeError('This record was not retrieved through a session, so its {} cannot be looked up.'
+                               .format(name))
+        records = [self]
+        if self._cohort is not None:
+            records.extend(record for record in list(self._cohort) if record is not self and record.valid
+                           and record._session is self._session and record._related_if_current(name) is None)
+        errors = self._session._resolve_relationship(records, name)
+        if id(self) in errors:
+            raise errors[id(self)]
+        return self._related_if_current(name)[0]
+
+    def _related_if_current(self, name):
+        # type: (str) -> Union[Tuple[Any], None]
+        """
+        :param name: The name of the relationship.
+        :return: A tuple containing the linked records, if they were looked up for the current ids.
+        """
+        ids = getattr(self, type(self)._relationships[name][1])
+        key = tuple(ids) if isinstance(ids, list) else ids
+        memo = self._related_records.get(name)
+        if memo is None or memo[0] != key:
+            return None
+        return memo[1],
+
+    def _set_related(self, name, ids, related):
+        # type: (str, Any, Any) -> None
+        self._related_records[name] = (tuple(ids) if isinstance(ids, list) else ids, related)
@@ -1,10 +1,14 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, TYPE_CHECKING
 
 from omics_dashboard_client.record.numeric_file_record import NumericFileRecord
 
+if TYPE_CHECKING:
+    from omics_dashboard_client.record.sample_group import SampleGroup
+
 
 class Sample(NumericFileRecord):
     url_suffix = 'samples'
+    _relationships = dict(NumericFileRecord._relationships, sample_groups=('SampleGroup', 'sample_group_ids'))
 
     def __init__(self,
                  res_data,
@@ -20,6 +24,7 @@ class Sample(NumericFileRecord):
                                      '{}/{}'.format(base_url, Sample.url_suffix),
                                      session_user_is_admin)
         self._sample_group_ids = res_data['sample_group_ids']
+        self._save_state()
 
     @property
     def sample_group_ids(self):
@@ -33,8 +38,9 @@ class Sample(NumericFileRecord):
     @sample_group_ids.setter
     def sample_group_ids(self, value):
         # type: (List[int]) -> None
-        if self.__is_write_permitted:
+        if self._is_write_permitted:
             self._sample_group_ids = value
+            self._mark_changed('sample_group_ids')
         else:
             raise RuntimeError('Current user cannot edit this field.')
 
@@ -42,6 +48,15 @@ class Sample(NumericFileRecord):
     def sample_group_ids(self):
         raise RuntimeError('Fields cannot be deleted.')
 
+    @property
+    def sample_groups(self):
+        # type: () -> List[SampleGroup]
+        """
+        The sample groups this sample belongs to.
+        :return:
+        """
+        return self._related('sample_groups')
+
     def serialize(self):
         # type: () -> Dict[str, Any]
         """
@@ -57,3 +72,4 @@ class Sample(NumericFileRecord):
     def update(self, new_data, base_url):
         super(Sample, self).update(new_data, '{}/{}'.format(base_url, Sample.url_suffix))
         self._sample_group_ids = new_data['sample_group_ids']
+        self._save_state()
@@ -1,10 +1,17 @@
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Union, TYPE_CHECKING
 
 from omics_dashboard_client.record.omics_record import OmicsRecord
 
+if TYPE_CHECKING:
+    from omics_dashboard_client.record.job import Job
+    from omics_dashboard_client.record.sample import Sample
+
 
 class SampleGroup(OmicsRecord):
     url_suffix = "sample_groups"
+    _relationships = dict(OmicsRecord._relationships,
+                          samples=('Sample', 'sample_ids'),
+                          upload_job=('Job', 'upload_job_id'))
 
     def __init__(self,
                  res_data,
@@ -21,6 +28,7 @@ class SampleGroup(OmicsRecord):
                                           session_user_is_admin)
         self._sample_ids = [sample['id'] for sample in res_data['samples']]
         self._upload_job_id = res_data['upload_job_id']
+        self._save_state()
 
     @property
     def sample_ids(self):
@@ -34,8 +42,9 @@ class SampleGroup(OmicsRecord):
     @sample_ids.setter
     def sample_ids(self, value):
         # type: (List[int]) -> None
-        if self.__is_write_permitted:
+        if self._is_write_permitted:
             self._sample_ids = value
+            self._mark_changed('sample_ids')
         else:
             raise RuntimeError('Current user cannot edit this field.')
 
@@ -43,6 +52,15 @@ class SampleGroup(OmicsRecord):
     def sample_ids(self):
         raise RuntimeError('Fields cannot be deleted.')
 
+    @property
+    def samples(self):
+        # type: () -> List[Sample]
+        """
+        The samples in this group.
+        :return:
+        """
+        return self._related('samples')
+
     @property
     def upload_job_id(self):
         # type: () -> str
@@ -55,8 +73,9 @@ class SampleGroup(OmicsRecord):
     @upload_job_id.setter
     def upload_job_id(self, value):
         # type: (str) -> None
-        if self.__session_user_is_admin:
+        if self._session_user_is_admin:
             self._upload_job_id = value
+            self._mark_changed('upload_job_id')
         else:
             raise RuntimeError('Only admins can edit this field.')
 
@@ -64,6 +83,15 @@ class SampleGroup(OmicsRecord):
     def upload_job_id(self):
         raise RuntimeError('Fields cannot be deleted.')
 
+    @property
+    def upload_job(self):
+        # type: () -> Union[Job, None]
+        """
+        The job which created the samples of this group, if any.
+        :return:
+        """
+        return self._related('upload_job')
+
     def serialize(self):
         # type: () -> Dict[str, Any]
         """
@@ -81,3 +109,4 @@ class SampleGroup(OmicsRecord):
         super(SampleGroup, self).update(new_data, '{}/{}'.format(base_url, SampleGroup.url_suffix))
         self._sample_ids = [sample['id'] for sample in new_data['samples']]
         self._upload_job_id = new_data['upload_job_id']
+        self._save_state()
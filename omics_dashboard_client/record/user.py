@@ -1,10 +1,17 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Union, TYPE_CHECKING
 
 from omics_dashboard_client.record.record import Record
 
+if TYPE_CHECKING:
+    from omics_dashboard_client.record.user_group import UserGroup
+
 
 class User(Record):
     url_suffix = 'users'
+    _relationships = dict(Record._relationships,
+                          groups=('UserGroup', 'group_ids'),
+                          primary_user_group=('UserGroup', 'primary_user_group_id'),
+                          admin_groups=('UserGroup', 'admin_group_ids'))
 
     def __init__(self,
                  res_data,
@@ -137,6 +144,15 @@ class User(Record):
     def group_ids(self):
         raise RuntimeError('Fields cannot be deleted.')
 
+    @property
+    def groups(self):
+        # type: () -> List[UserGroup]
+        """
+        The user groups this user is a member of.
+        :return:
+        """
+        return self._related('groups')
+
     @property
     def primary_user_group_id(self):
         # type: () -> int
@@ -160,6 +176,15 @@ class User(Record):
     def primary_user_group_id(self):
         raise RuntimeError('Fields cannot be deleted.')
 
+    @property
+    def primary_user_group(self):
+        # type: () -> Union[UserGroup, None]
+        """
+        The primary user group of this user.
+        :return:
+        """
+        return self._related('primary_user_group')
+
     @property
     def admin_group_ids(self):
         # type: () -> List[int]
@@ -178,6 +203,15 @@ class User(Record):
     def admin_group_ids(self):
         raise RuntimeError('Fields cannot be deleted.')
 
+    @property
+    def admin_groups(self):
+        # type: () -> List[UserGroup]
+        """
+        The user groups this user administers.
+        :return:
+        """
+        return self._related('admin_groups')
+
     def serialize(self):
         # type: () -> Dict[str, Any]
         """
@@ -1,13 +1,20 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Union, TYPE_CHECKING
 
 from omics_dashboard_client.record.record import Record
 
+if TYPE_CHECKING:
+    from omics_dashboard_client.record.user import User
+
 
 class UserGroup(Record):
     """
     A user group on the Omics Dashboard service.
     """
     url_suffix = 'user_groups'
+    _relationships = dict(Record._relationships,
+                          members=('User', 'member_ids'),
+                          admins=('User', 'admin_ids'),
+                          creator=('User', 'creator_id'))
 
     def __init__(self,
                  res_data,
@@ -91,6 +98,15 @@ class UserGroup(Record):
     def member_ids(self):
         raise RuntimeError('Fields cannot be deleted.')
 
+    @property
+    def members(self):
+        # type: () -> List[User]
+        """
+        The members of this group.
+        :return:
+        """
+        return self._related('members')
+
     @property
     def admin_ids(self):
         # type: () -> List[int]
@@ -111,6 +127,15 @@ class UserGroup(Record):
     def admin_ids(self):
         raise RuntimeError('Fields cannot be deleted.')
 
+    @property
+    def admins(self):
+        # type: () -> List[User]
+        """
+        The admins of this group.
+        :return:
+        """
+        return self._related('admins')
+
     @property
     def creator_id(self):
         # type: () -> int
@@ -132,6 +157,15 @@ class UserGroup(Record):
     def creator_id(self):
         raise RuntimeError('Fields cannot be deleted.')
 
+    @property
+    def creator(self):
+        # type: () -> Union[User, None]
+        """
+        The user who created this group.
+        :return:
+        """
+        return self._related('creator')
+
     def serialize(self):
         # type: () -> Dict[str, Any]
         """
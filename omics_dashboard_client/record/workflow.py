@@ -1,13 +1,17 @@
-from typing import Dict, List, Any
+from typing import Dict, List, Any, TYPE_CHECKING
 
 from omics_dashboard_client.record.file_record import FileRecord
 
+if TYPE_CHECKING:
+    from omics_dashboard_client.record.analysis import Analysis
+
 
 class Workflow(FileRecord):
     """
     A workflow on the Omics Dashboard service.
     """
     url_suffix = 'workflows'
+    _relationships = dict(FileRecord._relationships, analyses=('Analysis', 'analysis_ids'))
 
     def __init__(self,
                  res_data,
@@ -25,6 +29,7 @@ class Workflow(FileRecord):
         self._workflow_language = res_data['workflow_language']
         self._workflow_definition = res_data['workflow_definition']
         self._analysis_ids = res_data['analysis_ids']
+        self._save_state()
 
     @property
     def workflow_language(self):
@@ -34,8 +39,9 @@ class Workflow(FileRecord):
     @workflow_language.setter
     def workflow_language(self, value):
         # type: (str) -> None
-        if self.__session_user_is_admin:
+        if self._session_user_is_admin:
             self._workflow_language = value
+            self._mark_changed('workflow_language')
         else:
             raise RuntimeError('Only admins can set this field.')
 
@@ -50,8 +56,9 @@ class Workflow(FileRecord):
 
     @workflow_definition.setter
     def workflow_definition(self, value):
-        if self.__is_write_permitted:
+        if self._is_write_permitted:
             self._workflow_definition = value
+            self._mark_changed('workflow_definition')
         else:
             raise RuntimeError('Current user cannot edit this field.')
 
@@ -67,8 +74,9 @@ class Workflow(FileRecord):
     @analysis_ids.setter
     def analysis_ids(self, value):
         # type: (List[int]) -> None
-        if self.__is_write_permitted:
+        if self._is_write_permitted:
             self._analysis_ids = value
+            self._mark_changed('analysis_ids')
         else:
             raise RuntimeError('Current user cannot edit this field.')
 
@@ -76,6 +84,15 @@ class Workflow(FileRecord):
     def analysis_ids(self):
         raise RuntimeError('Fields cannot be deleted.')
 
+    @property
+    def analyses(self):
+        # type: () -> List[Analysis]
+        """
+        The analyses this workflow is part of.
+        :return:
+        """
+        return self._related('analyses')
+
     def serialize(self):
         # type: () -> Dict[str, Any]
         """
@@ -95,3 +112,4 @@ class Workflow(FileRecord):
         self._workflow_language = new_data['workflow_language']
         self._workflow_definition = new_data['workflow_definition']
         self._analysis_ids = new_data['analysis_ids']
+        self._save_state()
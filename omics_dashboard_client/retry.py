@@ -0,0 +1,170 @@
+import random
+import threading
+import time
+from typing import Iterable, Union
+
+import requests
+
+
+class CircuitOpenError(RuntimeError):
+    """
+    Raised instead of making a request while the circuit breaker of a session is open.
+    """
+    pass
+
+
+class RetryPolicy(object):
+    """
+    Decides whether a failed request is tried again and how long to wait before doing so. Idempotent requests (GET) are
+    retried after connection errors and after responses with a status in retry_statuses. Other requests are only
+    retried if retry_non_idempotent is set.
+    """
+
+    def __init__(self, max_retries=3, backoff_factor=0.5, max_backoff=30.0, retry_statuses=(429, 502, 503, 504),
+                 retry_non_idempotent=False, jitter=True):
+        # type: (int, float, float, Iterable[int], bool, bool) -> None
+        """
+        :param max_retries: The maximum number of times one request is retried.
+        :param backoff_factor: The wait before retry n (counting from 0) is at most backoff_factor * 2 ** n seconds.
+        :param max_backoff: The longest wait between two attempts in seconds.
+        :param retry_statuses: The response statuses which are retried.
+        :param retry_non_idempotent: Whether requests which change data on the service (POST, DELETE) are retried too.
+        :param jitter: Whether to wait a random time between 0 and the backoff ("full jitter") so that many clients do
+                       not retry in lockstep.
+        """
+        self._max_retries = max_retries
+        self._backoff_factor = backoff_factor
+        self._max_backoff = max_backoff
+        self._retry_statuses = frozenset(retry_statuses)
+        self._retry_non_idempotent = retry_non_idempotent
+        self._jitter = jitter
+
+    @property
+    def max_retries(self):
+        # type: () -> int
+        return self._max_retries
+
+    @property
+    def retry_statuses(self):
+        # type: () -> frozenset
+        return self._retry_statuses
+
+    def should_retry(self, attempt, idempotent, response=None):
+        # type: (int, bool, Union[requests.Response, None]) -> bool
+        """
+        :param attempt: The number of retries already made.
+        :param idempotent: Whether the request can be repeated without changing the result.
+        :param response: The response, or None if the request failed with a connection error.
+        :return: Whether to try again.
+        """
+        if attempt >= self._max_retries or not (idempotent or self._retry_non_idempotent):
+            return False
+        return response is None or response.status_code in self._retry_statuses
+
+    def backoff(self, attempt, response=None):
+        # type: (int, Union[requests.Response, None]) -> float
+        """
+        :param attempt: The number of retries already made.
+        :param response: The failed response, if any. A numeric Retry-After header is respected.
+        :return: How long to wait in seconds before the next attempt.
+        """
+        delay = min(self._max_backoff, self._backoff_factor * 2 ** attempt)
+        if self._jitter:
+            delay = random.uniform(0, delay)
+        if response is not None:
+            try:
+                delay = max(delay, min(self._max_backoff, float(response.headers['Retry-After'])))
+            except (KeyError, ValueError):
+                pass
+        return delay
+
+
+class CircuitBreaker(object):
+    """
+    Stops a session from sending requests to a service that keeps failing. After failure_threshold consecutive failures
+    (connection errors or server errors), requests fail immediately with CircuitOpenError for reset_timeout seconds.
+    After that, one trial request is let through: the circuit closes if it succeeds and opens again if it fails.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        # type: (int, float) -> None
+        """
+        :param failure_threshold: The number of consecutive failures which opens the circuit.
+        :param reset_timeout: How long (in seconds) the circuit stays open before a trial request is allowed.
+        """
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_on = None
+        self._trial_in_progress = False
+        self._rejections = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        # type: () -> str
+        with self._lock:
+            return self._state()
+
+    @property
+    def rejections(self):
+        # type: () -> int
+        """
+        The number of requests refused because the circuit was open.
+        :return:
+        """
+        return self._rejections
+
+    def _state(self):
+        if self._opened_on is None:
+            return CircuitBreaker.CLOSED
+        if time.time() - self._opened_on >= self._reset_timeout:
+            return CircuitBreaker.HALF_OPEN
+        return CircuitBreaker.OPEN
+
+    def before_request(self):
+        """
+        Raise CircuitOpenError if a request may not be made now.
+        :return:
+        """
+        with self._lock:
+            state = self._state()
+            if state == CircuitBreaker.CLOSED:
+                return
+            if state == CircuitBreaker.HALF_OPEN and not self._trial_in_progress:
+                self._trial_in_progress = True
+                return
+            self._rejections += 1
+            raise CircuitOpenError('The service failed {} times in a row. Not sending requests until {:g} s after '
+                                   'the last failure.'.format(self._failures, self._reset_timeout))
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_on = None
+            self._trial_in_progress = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_progress or self._failures >= self._failure_threshold:
+                self._opened_on = time.time()
+            self._trial_in_progress = False
+
+    def cancel_trial(self):
+        """
+        Let another trial request through if the current one failed for a reason unrelated to the service.
+        :return:
+        """
+        with self._lock:
+            self._trial_in_progress = False
+
+    def reset(self):
+        """
+        Close the circuit.
+        :return:
+        """
+        self.record_success()
@@ -0,0 +1,251 @@
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Tuple, Union
+
+from omics_dashboard_client.record.file_ownership import create_temp_dir, register_temp_dir
+from omics_dashboard_client.record.file_record import FileRecord
+
+
+class ScratchSpaceFullError(RuntimeError):
+    """
+    Raised when a download does not fit in the quota of a scratch space, even after removing every file no record holds.
+    """
+    pass
+
+
+def _directory_size(path):
+    # type: (str) -> int
+    size = 0
+    for directory, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                size += os.path.getsize(os.path.join(directory, filename))
+            except OSError:
+                pass
+    return size
+
+
+class _Entry(object):
+    """
+    A directory handed out by a scratch space.
+    """
+
+    def __init__(self, key, size):
+        # type: (Tuple[Any, ...], int) -> None
+        self.key = key
+        self.size = size
+        self.held = True
+        self.snapshot = None  # (filename, size, mtime, digest) of the downloaded file, once the download finished
+
+
+class ScratchSpace(object):
+    """
+    The place where a session downloads files to, instead of the temporary directory of the system. Every download gets
+    a directory under root, and small files can be put on a faster filesystem such as a tmpfs. When no record holds a
+    file any more, the file is kept, so it can be given to the next record of the same version without downloading it
+    again. Files no record holds are removed, least recently used first, when the files take more than max_bytes.
+    Closing the scratch space (or leaving its with block) removes its files, including those still held by records.
+
+        with ScratchSpace('/nvme/scratch', max_bytes=200 * 1024 ** 3, small_file_root='/dev/shm') as scratch:
+            session = Session('https://example.com/omics', 'credentials.json', scratch_space=scratch)
+            ...
+    """
+
+    def __init__(self, root=None, max_bytes=None, small_file_root=None, small_file_size=16777216):
+        # type: (Union[str, None], Union[int, None], Union[str, None], int) -> None
+        """
+        :param root: The directory to put downloads in. Created if it does not exist. Defaults to the temporary
+                     directory of the system.
+        :param max_bytes: The maximum total size of the downloaded files, in bytes. None for no limit.
+        :param small_file_root: A directory on a fast filesystem (ex: '/dev/shm') for files of at most small_file_size
+                                bytes. None to put every file under root.
+        :param small_file_size: The largest file put in small_file_root, in bytes.
+        """
+        root = os.path.abspath(root if root is not None else tempfile.gettempdir())
+        if not os.path.isdir(root):
+            os.makedirs(root)
+        self._max_bytes = max_bytes
+        self._small_file_size = small_file_size
+        # our own directories, so that several scratch spaces (or processes) can share root
+        self._directory = tempfile.mkdtemp(dir=root, prefix='omics-scratch-')
+        self._small_file_directory = tempfile.mkdtemp(dir=small_file_root, prefix='omics-scratch-') \
+            if small_file_root is not None else None
+        self._entries = OrderedDict()  # type: Dict[str, _Entry]  # least recently used first
+        self._closed = False
+        self._lock = threading.RLock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def directory(self):
+        # type: () -> str
+        """
+        The directory under root holding the downloads of this scratch space.
+        :return:
+        """
+        return self._directory
+
+    @property
+    def small_file_directory(self):
+        # type: () -> Union[str, None]
+        return self._small_file_directory
+
+    @property
+    def max_bytes(self):
+        # type: () -> Union[int, None]
+        return self._max_bytes
+
+    @property
+    def size(self):
+        # type: () -> int
+        """
+        The total size of the downloaded files, in bytes, as of when they were downloaded or last released. Downloads
+        in progress count with their expected size.
+        :return:
+        """
+        with self._lock:
+            return sum(entry.size for entry in self._entries.values())
+
+    @property
+    def closed(self):
+        # type: () -> bool
+        return self._closed
+
+    @staticmethod
+    def _key(record):
+        # type: (FileRecord) -> Tuple[Any, ...]
+        return type(record).url_suffix, record.id, record.updated_on, record.filename
+
+    def prepare_download(self, record, size=None):
+        # type: (FileRecord, Union[int, None]) -> str
+        """
+        Give a record a new directory to download its file to, removing files no record holds if the quota requires it.
+        :param record:
+        :param size: The size of the file, if known. Files of unknown size are put under root.
+        :return: The filename the file should be written to.
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('This scratch space is closed.')
+            self._evict(size or 0)
+            small = self._small_file_directory is not None and size is not None and size <= self._small_file_size
+            path = create_temp_dir(self._small_file_directory if small else self._directory, self._released)
+            self._entries[path] = _Entry(self._key(record), size or 0)
+        return record.prepare_download(path)
+
+    def finish_download(self, record):
+        # type: (FileRecord) -> None
+        """
+        Note that the file of a record given a directory by prepare_download is complete.
+        :param record:
+        :return:
+        """
+        with self._lock:
+            entry = self._entries.get(record.temp_dir)
+            if entry is None or record._file_snapshot is None:
+                return
+            entry.key = self._key(record)
+            entry.snapshot = record._file_snapshot
+            entry.size = entry.snapshot[1]
+            self._entries.pop(record.temp_dir)
+            self._entries[record.temp_dir] = entry
+            self._evict()
+
+    def reuse(self, record):
+        # type: (FileRecord) -> bool
+        """
+        Give a record the file of the same version of the same record, if no record holds it and it was not changed.
+        :param record:
+        :return: Whether the record got a file.
+        """
+        key = self._key(record)
+        with self._lock:
+            for path, entry in list(self._entries.items()):
+                if entry.held or entry.key != key or entry.snapshot is None:
+                    continue
+                filename, size, mtime, digest = entry.snapshot
+                try:
+                    stat = os.stat(filename)
+                except OSError:
+                    stat = None
+                if stat is None or stat.st_size != size or stat.st_mtime != mtime:
+                    self._remove(path)  # changed after it was downloaded
+                    continue
+                register_temp_dir(path, self._released)
+                entry.held = True
+                self._entries.pop(path)
+                self._entries[path] = entry
+                record.finish_download(record.prepare_download(path), digest)
+                return True
+        return False
+
+    def _released(self, path, forgotten):
+        # type: (str, bool) -> None
+        with self._lock:
+            entry = self._entries.get(path)
+            if self._closed or entry is None:
+                shutil.rmtree(path, ignore_errors=True)
+            elif forgotten:
+                del self._entries[path]  # the file was detached from its record, so it is not ours any more
+            elif entry.snapshot is None:
+                self._remove(path)  # the download never finished
+            else:
+                entry.held = False
+                entry.size = _directory_size(path)
+                self._evict()
+
+    def _remove(self, path):
+        # type: (str) -> None
+        self._entries.pop(path, None)
+        shutil.rmtree(path, ignore_errors=True)
+
+    def _evict(self, extra=0):
+        # type: (int) -> None
+        """
+        Remove the least recently used files no record holds until the files fit in max_bytes with extra bytes to spare.
+        :param extra:
+        :return:
+        """
+        if self._max_bytes is None:
+            return
+        total = sum(entry.size for entry in self._entries.values())
+        for path in [path for path, entry in self._entries.items() if not entry.held]:
+            if total + extra <= self._max_bytes:
+                return
+            total -= self._entries[path].size
+            self._remove(path)
+        if extra and total + extra > self._max_bytes:
+            raise ScratchSpaceFullError('A file of {} bytes does not fit in the scratch space: {} of {} bytes are held '
+                                        'by records.'.format(extra, total, self._max_bytes))
+
+    def evict(self):
+        """
+        Remove every file no record holds.
+        :return:
+        """
+        with self._lock:
+            for path in [path for path, entry in self._entries.items() if not entry.held]:
+                self._remove(path)
+
+    def close(self):
+        """
+        Remove all the files of this scratch space, including those held by records, and hand out no more directories.
+        Files detached from their records (see FileRecord.detach_file) are kept.
+        :return:
+        """
+        with self._lock:
+            self._closed = True
+            for path in list(self._entries):
+                self._remove(path)
+            for directory in (self._directory, self._small_file_directory):
+                try:
+                    os.rmdir(directory)
+                except (OSError, TypeError):  # holds detached files, or there is no small file directory
+                    pass
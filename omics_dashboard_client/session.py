@@ -1,14 +1,38 @@
+import base64
+import hashlib
 import json
-from typing import Union, Dict, Type, List, Any
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Union, Dict, Type, List, Any, Callable, Iterable, Iterator, Tuple
 
+import pandas as pd
 import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
 
+from omics_dashboard_client.analysis_bundle import AnalysisBundle
+from omics_dashboard_client.batch import BatchReport, BatchResult, JobReport
+from omics_dashboard_client.download_cache import DownloadCache
+from omics_dashboard_client.frames import entries_to_frame, frame_to_entries, required_columns
+from omics_dashboard_client.identity_map import IdentityMap
+from omics_dashboard_client.instrumentation import RequestStats, endpoint_name
+from omics_dashboard_client.json_codec import JsonCodec, default_codec
+from omics_dashboard_client.json_stream import iter_json_array
+from omics_dashboard_client.metadata_cache import MetadataCache
+from omics_dashboard_client.multipart import MultipartFileEncoder
+from omics_dashboard_client.retry import RetryPolicy, CircuitBreaker
+from omics_dashboard_client.scratch_space import ScratchSpace
 from omics_dashboard_client.record.analysis import Analysis
 from omics_dashboard_client.record.collection import Collection
 from omics_dashboard_client.record.external_file import ExternalFile
 from omics_dashboard_client.record.file_record import FileRecord
 from omics_dashboard_client.record.job import Job
-from omics_dashboard_client.record.record import Record
+from omics_dashboard_client.record.lite_record import LiteRecord, lite_record_type
+from omics_dashboard_client.record.omics_record import OmicsRecord
+from omics_dashboard_client.record.record import Record, record_type_named
 from omics_dashboard_client.record.sample import Sample
 from omics_dashboard_client.record.sample_group import SampleGroup
 from omics_dashboard_client.record.user import User
@@ -21,40 +45,235 @@ AnyRecord = Union[Analysis, Collection, ExternalFile, Job, Sample, SampleGroup,
 AnyRecordType = Type[AnyRecord]
 FileRecordType = Type[Union[Collection, ExternalFile, Sample, Workflow]]
 
+# The records whose JSON lists records of another type, so that editing a record of that type changes them too
+_RELATED_URL_SUFFIXES = {
+    Analysis.url_suffix: (Collection.url_suffix, ExternalFile.url_suffix, Workflow.url_suffix),
+    Collection.url_suffix: (Analysis.url_suffix,),
+    ExternalFile.url_suffix: (Analysis.url_suffix,),
+    Workflow.url_suffix: (Analysis.url_suffix,),
+    Sample.url_suffix: (SampleGroup.url_suffix,),
+    SampleGroup.url_suffix: (Sample.url_suffix,),
+    User.url_suffix: (UserGroup.url_suffix,),
+    UserGroup.url_suffix: (User.url_suffix,)
+}  # type: Dict[str, Tuple[str, ...]]
+
+
+def _decode_token_expiry(token):
+    # type: (str) -> Union[float, None]
+    """
+    Read the "exp" claim of a JSON Web Token without verifying its signature.
+    :param token:
+    :return: The expiry of the token as a unix timestamp, or None if the token is not a JWT or has no expiry.
+    """
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload.encode('ascii')).decode('utf-8'))
+        return float(claims['exp'])
+    except (AttributeError, IndexError, KeyError, TypeError, ValueError):
+        return None
+
 
 class Session:
     """
     Create one of these before doing anything else
     """
 
-    def __init__(self, base_url, credentials=None, auth_token=None):
-        # type: (str, Union[str, Dict[str, str]], Union[str, None]) -> None
+    def __init__(self, base_url, credentials=None, auth_token=None, auth_ttl=300, auth_expiry_margin=30,
+                 pool_connections=10, pool_maxsize=10, pool_block=False, headers=None, download_chunk_size=1048576,
+                 download_resume_attempts=3, download_cache=None, metadata_cache=None, retry_policy=None,
+                 circuit_breaker=True, upload_chunk_size=1048576, request_stats=True, adapter=None, identity_map=None,
+                 json_codec=None, scratch_space=None):
+        # type: (str, Union[str, Dict[str, str]], Union[str, None], float, float, int, int, bool, Dict[str, str], int, int, Union[DownloadCache, str, None], Union[MetadataCache, None], Union[RetryPolicy, None], Union[CircuitBreaker, bool], int, Union[RequestStats, bool], Union[BaseAdapter, None], Union[IdentityMap, bool, None], Union[JsonCodec, None], Union[ScratchSpace, str, None]) -> None
         """
         :param base_url:  The base url of your Omics Dashboard service (ex: 'https://example.com/omics')
         :param credentials: Either a filename of a json file (which you should have 400 permissions or be similarly secure)
                             or a dictionary containing an email and password
+        :param auth_token: An existing authentication token to use instead of credentials.
+        :param auth_ttl: How long (in seconds) a successful authentication check is trusted when the token has no
+                         readable expiry.
+        :param auth_expiry_margin: How long (in seconds) before the expiry of the token it is considered expired.
+        :param pool_connections: The number of hosts to keep connection pools for.
+        :param pool_maxsize: The maximum number of keep-alive connections kept per host.
+        :param pool_block: Whether to wait for a free connection when the pool of a host is exhausted instead of opening
+                           a connection which will not be kept alive.
+        :param headers: Headers sent with every request.
+        :param download_chunk_size: The number of bytes read from the network and written to disk at a time when
+                                    downloading files.
+        :param download_resume_attempts: How many times an interrupted download is resumed (when the server supports
+                                         range requests) before giving up.
+        :param download_cache: A DownloadCache (or the directory of one) to serve downloads from and store them in.
+        :param metadata_cache: A MetadataCache used by get and get_all to avoid transferring unchanged records.
+        :param retry_policy: When and how to retry failed requests. Defaults to RetryPolicy(), which retries only
+                             idempotent requests.
+        :param circuit_breaker: A CircuitBreaker, True for a default one or False to disable it.
+        :param upload_chunk_size: The number of bytes read from disk at a time when uploading files.
+        :param request_stats: A RequestStats to count requests in, True for a new one or False to not count requests.
+        :param adapter: A requests transport adapter to send all requests through instead of the pooled HTTPAdapter
+                        (ex: a FakeOmicsDashboard). The pool parameters are ignored when it is set.
+        :param identity_map: An IdentityMap (or True for a default one) so that get, get_many, get_all and iter_all
+                             return the same object each time a record is looked up, updated in place with the current
+                             state on the service. Off by default.
+        :param json_codec: The JsonCodec used to encode request bodies and decode responses. Defaults to an OrjsonCodec
+                           if orjson is installed, otherwise the json module is used.
+        :param scratch_space: A ScratchSpace (or the root directory of one) to download files to, instead of the
+                              temporary directory of the system. A scratch space made from a directory is closed with the
+                              session.
         """
         self.__base_url = '{}/api'.format(base_url)
+        self.__http = requests.Session()
+        if adapter is None:
+            adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block)
+        self.__http.mount('http://', adapter)
+        self.__http.mount('https://', adapter)
+        if headers is not None:
+            self.__http.headers.update(headers)
         self.__auth_token = None
         self.__current_user = None
+        self.__credentials = None
+        self.__auth_ttl = auth_ttl
+        self.__auth_expiry_margin = auth_expiry_margin
+        self.__token_expires_at = None
+        self.__auth_checked_until = None
+        self.__validation_calls_saved = 0
+        self.__auth_lock = threading.RLock()
+        self.__download_chunk_size = download_chunk_size
+        self.__download_resume_attempts = download_resume_attempts
+        self.__download_cache = DownloadCache(download_cache) if isinstance(download_cache, str) else download_cache
+        self.__metadata_cache = metadata_cache
+        self.__owns_scratch_space = isinstance(scratch_space, str)
+        self.__scratch_space = ScratchSpace(scratch_space) if isinstance(scratch_space, str) else scratch_space
+        self.__json_codec = json_codec if json_codec is not None else default_codec()
+        self.__retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        if circuit_breaker is True:
+            circuit_breaker = CircuitBreaker()
+        self.__circuit_breaker = circuit_breaker or None
+        self.__retry_stats = {'retries': 0, 'backoff_seconds': 0.0, 'gave_up': 0}
+        self.__retry_stats_lock = threading.Lock()
+        self.__upload_chunk_size = upload_chunk_size
+        if request_stats is True:
+            request_stats = RequestStats()
+        self.__request_stats = request_stats or None
+        if identity_map is True:
+            identity_map = IdentityMap()
+        self.__identity_map = identity_map if identity_map is not False else None
         self.authenticate(credentials, auth_token)
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """
+        Close all pooled connections, and the scratch space if the session made it.
+        :return:
+        """
+        self.__http.close()
+        if self.__owns_scratch_space:
+            self.__scratch_space.close()
+
+    @property
+    def http_session(self):
+        # type: () -> requests.Session
+        """
+        The requests.Session used for all requests made by this session. Adapters mounted on it and headers set on it
+        apply to every request.
+        :return:
+        """
+        return self.__http
+
+    @property
+    def download_cache(self):
+        # type: () -> Union[DownloadCache, None]
+        """
+        The persistent cache downloads are served from, if any.
+        :return:
+        """
+        return self.__download_cache
+
+    @property
+    def scratch_space(self):
+        # type: () -> Union[ScratchSpace, None]
+        return self.__scratch_space
+
+    @property
+    def metadata_cache(self):
+        # type: () -> Union[MetadataCache, None]
+        """
+        The cache of record metadata used by get and get_all, if any.
+        :return:
+        """
+        return self.__metadata_cache
+
+    @property
+    def identity_map(self):
+        # type: () -> Union[IdentityMap, None]
+        """
+        The map of the records handed out by this session, if there is one.
+        :return:
+        """
+        return self.__identity_map
+
+    @property
+    def validation_calls_saved(self):
+        # type: () -> int
+        """
+        The number of requests to the current_user endpoint avoided by trusting a previous authentication check.
+        :return:
+        """
+        return self.__validation_calls_saved
+
+    def _auth_request(self, method, url, **kwargs):
+        # type: (str, str, Any) -> requests.Response
+        """
+        Make a request which checks or obtains authentication, so it is not authenticated or retried like other
+        requests, but is recorded in the request statistics.
+        :param method:
+        :param url:
+        :param kwargs: Passed to requests.Session.request.
+        :return:
+        """
+        start = time.time()
+        try:
+            res = self.__http.request(method, url, **kwargs)
+        except Exception as e:
+            self._record_request(method, url, start, 0, error=e)
+            raise
+        self._record_request(method, url, start, 0, res)
+        return res
+
     def _refresh_current_user(self):
-        res = requests.get('{}/current_user'.format(self.__base_url),
-                           headers={'Authorization': 'Bearer {}'.format(self.__auth_token)})
+        res = self._auth_request('GET', '{}/current_user'.format(self.__base_url))
         res.raise_for_status()
-        self.__current_user = User(res.json(), self.__base_url, False)
+        self.__current_user = User(self._decode(res), self.__base_url, False)
+        if self.__token_expires_at is not None:
+            self.__auth_checked_until = self.__token_expires_at
+        else:
+            self.__auth_checked_until = time.time() + self.__auth_ttl
+
+    def _set_auth_token(self, auth_token):
+        # type: (str) -> None
+        self.__auth_token = auth_token
+        self.__http.headers['Authorization'] = 'Bearer {}'.format(auth_token)
+        self.__auth_checked_until = None
+        token_expiry = _decode_token_expiry(auth_token)
+        self.__token_expires_at = token_expiry - self.__auth_expiry_margin if token_expiry is not None else None
 
     def authenticate(self, credentials, auth_token=None):
         try:
             if auth_token is not None:
-                self.__auth_token = auth_token
+                self._set_auth_token(auth_token)
                 self._refresh_current_user()
             elif credentials is not None:
                 credentials = json.load(open(credentials)) if isinstance(credentials, str) else credentials
-                res = requests.post('{}/authenticate'.format(self.__base_url), json=credentials)
+                res = self._auth_request('POST', '{}/authenticate'.format(self.__base_url),
+                                         data=self.__json_codec.dumps(credentials),
+                                         headers={'Content-Type': 'application/json'})
                 res.raise_for_status()
-                self.__auth_token = res.json()['token']
+                self.__credentials = credentials
+                self._set_auth_token(self._decode(res)['token'])
                 self._refresh_current_user()
             else:
                 raise ValueError('Credentials or an authentication token must be provided.'
@@ -65,6 +284,12 @@ class Session:
 
     def is_authenticated(self):
         if self.__auth_token is not None:
+            now = time.time()
+            if self.__token_expires_at is not None and now >= self.__token_expires_at:
+                return False
+            if self.__auth_checked_until is not None and now < self.__auth_checked_until:
+                self.__validation_calls_saved += 1
+                return self.__current_user.active
             try:
                 self._refresh_current_user()
                 return self.__current_user.active
@@ -72,29 +297,343 @@ class Session:
                 return False
         return False
 
-    def get_auth_header(self):
-        if self.is_authenticated():
-            return {'Authorization': 'Bearer {}'.format(self.__auth_token)}
-        else:
+    def invalidate_auth(self):
+        """
+        Forget the result of the last authentication check so that the next request checks the token again.
+        :return:
+        """
+        self.__auth_checked_until = None
+
+    def _ensure_authenticated(self):
+        with self.__auth_lock:
+            authenticated = self.is_authenticated()
+            if not authenticated and self.__credentials is not None:
+                self.authenticate(self.__credentials)
+                authenticated = self.__current_user.active
+        if not authenticated:
             raise RuntimeError('Authorization is invalid or expired. Please run authenticate() with your credentials.')
 
-    def download_file(self, record):
-        # type: (FileRecord) -> FileRecord
+    def get_auth_header(self):
+        self._ensure_authenticated()
+        return {'Authorization': 'Bearer {}'.format(self.__auth_token)}
+
+    def _request(self, method, url, idempotent=None, **kwargs):
+        # type: (str, str, Union[bool, None], Any) -> requests.Response
         """
-        Download the file associated with a FileRecord.
-        :param record:
+        Make an authenticated request on the pooled connection. If the server rejects the token, authenticate again and
+        retry once. Connection errors and transient server errors are retried according to the retry policy of the
+        session, and the circuit breaker is consulted before every attempt.
+        :param method: The HTTP method.
+        :param url: The url of the request.
+        :param idempotent: Whether the request can safely be repeated. Defaults to True for GET, HEAD and OPTIONS.
+        :param kwargs: Passed to requests.Session.request. A json body is encoded with the JSON codec of the session.
         :return:
         """
-        res = requests.get(record.download_url, headers=self.get_auth_header())
+        if idempotent is None:
+            idempotent = method.upper() in ('GET', 'HEAD', 'OPTIONS')
+        if 'json' in kwargs:
+            kwargs['data'] = self.__json_codec.dumps(kwargs.pop('json'))
+            kwargs['headers'] = dict(kwargs.get('headers') or {}, **{'Content-Type': 'application/json'})
+        start = time.time()
+        attempt = 0
         try:
-            res.raise_for_status()
-        except requests.HTTPError as e:
-            print('Response: ')
-            print(e.response.json())
-            raise e
-        record.download_file(res.content)
+            while True:
+                if self.__circuit_breaker is not None:
+                    self.__circuit_breaker.before_request()
+                try:
+                    res = self._send(method, url, **kwargs)
+                except (requests.ConnectionError, requests.Timeout):
+                    if self.__circuit_breaker is not None:
+                        self.__circuit_breaker.record_failure()
+                    if not self.__retry_policy.should_retry(attempt, idempotent):
+                        self._count_retry(gave_up=attempt > 0)
+                        raise
+                    delay = self.__retry_policy.backoff(attempt)
+                except Exception:
+                    # not a sign that the service is failing (ex: authentication was refused)
+                    if self.__circuit_breaker is not None:
+                        self.__circuit_breaker.cancel_trial()
+                    raise
+                else:
+                    failed = res.status_code >= 500 or res.status_code in self.__retry_policy.retry_statuses
+                    if self.__circuit_breaker is not None:
+                        if res.status_code >= 500:
+                            self.__circuit_breaker.record_failure()
+                        else:
+                            self.__circuit_breaker.record_success()
+                    if not failed or not self.__retry_policy.should_retry(attempt, idempotent, res):
+                        if failed and attempt > 0:
+                            self._count_retry(gave_up=True)
+                        break
+                    delay = self.__retry_policy.backoff(attempt, res)
+                    res.close()
+                self._count_retry(delay=delay)
+                time.sleep(delay)
+                self._rewind(kwargs)
+                attempt += 1
+        except Exception as e:
+            self._record_request(method, url, start, attempt, error=e)
+            raise
+        self._record_request(method, url, start, attempt, res, kwargs.get('stream', False))
+        return res
+
+    def _decode(self, res):
+        # type: (requests.Response) -> Any
+        """
+        Decode the JSON body of a response with the JSON codec of the session.
+        :param res:
+        :return:
+        """
+        return self.__json_codec.loads(res.content)
+
+    def _record_request(self, method, url, start, retries, response=None, streamed=False, error=None):
+        # type: (str, str, float, int, Union[requests.Response, None], bool, Union[Exception, None]) -> None
+        if self.__request_stats is not None:
+            self.__request_stats.record(method.upper(), endpoint_name(url, self.__base_url), url, time.time() - start,
+                                        retries, response, error, streamed)
+
+    def _send(self, method, url, **kwargs):
+        # type: (str, str, Any) -> requests.Response
+        self._ensure_authenticated()
+        res = self.__http.request(method, url, **kwargs)
+        if res.status_code == 401:
+            res.close()
+            self.invalidate_auth()
+            self._rewind(kwargs)
+            self._ensure_authenticated()
+            res = self.__http.request(method, url, **kwargs)
+        return res
+
+    @staticmethod
+    def _rewind(request_kwargs):
+        # type: (Dict[str, Any]) -> None
+        """
+        Seek files and streamed bodies in the arguments of a request back to the start so that the request can be
+        sent again.
+        :param request_kwargs:
+        :return:
+        """
+        if hasattr(request_kwargs.get('data'), 'rewind'):
+            request_kwargs['data'].rewind()
+        for file in (request_kwargs.get('files') or {}).values():
+            if hasattr(file, 'seek'):
+                file.seek(0)
+
+    def _count_retry(self, delay=None, gave_up=False):
+        # type: (Union[float, None], bool) -> None
+        with self.__retry_stats_lock:
+            if delay is not None:
+                self.__retry_stats['retries'] += 1
+                self.__retry_stats['backoff_seconds'] += delay
+            if gave_up:
+                self.__retry_stats['gave_up'] += 1
+
+    @property
+    def retry_stats(self):
+        # type: () -> Dict[str, Union[int, float]]
+        """
+        How many requests were retried, the total time spent waiting before retries, how many requests failed after
+        being retried, and how many requests the circuit breaker refused.
+        :return:
+        """
+        with self.__retry_stats_lock:
+            stats = dict(self.__retry_stats)
+        stats['circuit_rejections'] = self.__circuit_breaker.rejections if self.__circuit_breaker is not None else 0
+        return stats
+
+    @property
+    def request_stats(self):
+        # type: () -> Union[RequestStats, None]
+        """
+        The counters of the requests made by this session, if they are counted.
+        :return:
+        """
+        return self.__request_stats
+
+    def stats(self):
+        # type: () -> Dict[str, Any]
+        """
+        A snapshot of the request counters by endpoint and method (see RequestStats.snapshot) and of retry_stats.
+        :return:
+        """
+        return {
+            'endpoints': self.__request_stats.snapshot() if self.__request_stats is not None else {},
+            'retries': self.retry_stats
+        }
+
+    def export_stats(self, format='json'):
+        # type: (str) -> str
+        """
+        :param format: Either 'json' for the snapshot returned by stats, or 'prometheus' for the request counters in the
+                       Prometheus text exposition format.
+        :return:
+        """
+        if format == 'json':
+            return json.dumps(self.stats())
+        if format == 'prometheus':
+            return self.__request_stats.to_prometheus() if self.__request_stats is not None else ''
+        raise ValueError('Unknown stats format {}.'.format(format))
+
+    def add_request_hook(self, hook):
+        # type: (Callable[[Dict[str, Any]], None]) -> None
+        """
+        Call hook after every request with the details of the request (see RequestStats.add_hook).
+        :param hook:
+        :return:
+        """
+        if self.__request_stats is None:
+            raise RuntimeError('Requests are not counted by this session.')
+        self.__request_stats.add_hook(hook)
+
+    def remove_request_hook(self, hook):
+        # type: (Callable[[Dict[str, Any]], None]) -> None
+        if self.__request_stats is not None:
+            self.__request_stats.remove_hook(hook)
+
+    def download_file(self, record, chunk_size=None):
+        # type: (FileRecord, int) -> FileRecord
+        """
+        Download the file associated with a FileRecord. The file is streamed to disk in chunks, so memory use does not
+        depend on the size of the file. If the transfer is interrupted and the server accepts range requests, the
+        download is resumed where it stopped.
+        :param record:
+        :param chunk_size: The number of bytes written at a time. Defaults to the download_chunk_size of the session.
+        :return:
+        """
+        self._stream_download(record, chunk_size or self.__download_chunk_size)
+        self._note_download(record)
         return record
-    
+
+    def download_files(self, records, max_workers=4, chunk_size=None):
+        # type: (Iterable[FileRecord], int, int) -> BatchReport
+        """
+        Download the files of many FileRecords concurrently. A failed download does not stop the others.
+        :param records:
+        :param max_workers: The maximum number of simultaneous downloads.
+        :param chunk_size: The number of bytes written at a time. Defaults to the download_chunk_size of the session.
+        :return: A report with one result per record (in the order given) and the aggregate throughput.
+        """
+        chunk_size = chunk_size or self.__download_chunk_size
+        report = self._run_batch(lambda record: (record, self._stream_download(record, chunk_size)),
+                                 records, max_workers)
+        for result in report.succeeded:
+            self._note_download(result.value)
+        return report
+
+    def _note_download(self, record):
+        # type: (FileRecord) -> None
+        """
+        Update the size of the files of a record kept in the identity map after its file was downloaded.
+        :param record:
+        :return:
+        """
+        if self.__identity_map is not None and self.__identity_map.get(type(record), record.id) is record:
+            self.__identity_map.add(record)
+
+    @staticmethod
+    def _run_batch(operation, items, max_workers):
+        # type: (Callable[[Any], Tuple[Any, int]], Iterable[Any], int) -> BatchReport
+        """
+        Apply an operation to items on a bounded pool of threads, collecting a result for each item.
+        :param operation: Takes an item and returns its value and the number of bytes transferred.
+        :param items:
+        :param max_workers:
+        :return:
+        """
+        def run(item):
+            start = time.time()
+            try:
+                value, size = operation(item)
+                return BatchResult(item, value, size=size, elapsed=time.time() - start)
+            except Exception as e:
+                return BatchResult(item, error=e, elapsed=time.time() - start)
+
+        items = list(items)
+        start = time.time()
+        if not items:
+            return BatchReport([], 0.0)
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items)))) as executor:
+            results = list(executor.map(run, items))
+        return BatchReport(results, time.time() - start)
+
+    def _stream_download(self, record, chunk_size):
+        # type: (FileRecord, int) -> int
+        """
+        Write the file of a record to disk chunk by chunk.
+        :param record:
+        :param chunk_size:
+        :return: The number of bytes transferred.
+        """
+        scratch = self.__scratch_space
+        if scratch is not None and scratch.reuse(record):
+            return 0
+        filename = None
+        cached_size = self.__download_cache.cached_size(record) if self.__download_cache is not None else None
+        if cached_size is not None:
+            filename = self._prepare_download(record, cached_size)
+            if self.__download_cache.fetch(record, filename):
+                record.finish_download(filename)
+                if scratch is not None:
+                    scratch.finish_download(record)
+                return 0
+        written = 0
+        digest = hashlib.sha256()
+        resumable = False
+        resume_attempts = 0
+        while True:
+            headers = {'Range': 'bytes={}-'.format(written)} if written else {}
+            res = self._request('GET', record.download_url, headers=headers, stream=True)
+            try:
+                try:
+                    res.raise_for_status()
+                except requests.HTTPError as e:
+                    print('Response: ')
+                    print(e.response.text)
+                    raise e
+                if res.status_code != 206:  # the server sent the whole file
+                    written = 0
+                    digest = hashlib.sha256()
+                resumable = res.status_code == 206 or res.headers.get('Accept-Ranges') == 'bytes'
+                expected = written + int(res.headers['Content-Length']) if 'Content-Length' in res.headers else None
+                if filename is None:  # placed once the size is known
+                    filename = self._prepare_download(record, expected)
+                partial_filename = '{}.part'.format(filename)
+                with open(partial_filename, 'ab' if written else 'wb') as fp:
+                    for chunk in res.iter_content(chunk_size):
+                        fp.write(chunk)
+                        digest.update(chunk)
+                        written += len(chunk)
+                if expected is not None and written < expected:
+                    raise requests.exceptions.ChunkedEncodingError(
+                        'Download ended after {} of {} bytes.'.format(written, expected))
+            except (requests.ConnectionError, requests.exceptions.ChunkedEncodingError, requests.Timeout):
+                if not resumable or resume_attempts >= self.__download_resume_attempts:
+                    raise
+                resume_attempts += 1
+                continue
+            finally:
+                res.close()
+            break
+        os.rename(partial_filename, filename)
+        record.finish_download(filename, digest.hexdigest())
+        if scratch is not None:
+            scratch.finish_download(record)
+        if self.__download_cache is not None:
+            self.__download_cache.store(record, filename)
+        return written
+
+    def _prepare_download(self, record, size=None):
+        # type: (FileRecord, Union[int, None]) -> str
+        """
+        Get the filename the file of a record should be downloaded to, in the scratch space if there is one.
+        :param record:
+        :param size: The size of the file, if known.
+        :return:
+        """
+        if self.__scratch_space is not None:
+            return self.__scratch_space.prepare_download(record, size)
+        return record.prepare_download()
+
     def get(self, record_type, record_id, download_file=False):
         # type: (AnyRecordType, Union[str, int]) -> AnyRecord
         """
@@ -104,28 +643,313 @@ class Session:
         :return: The record with the specified id
         """
         url = '{}/{}/{}'.format(self.__base_url, record_type.url_suffix, record_id)
-        res = requests.get(url, headers=self.get_auth_header())
-        res.raise_for_status()
-        record = record_type(res.json(), self.__base_url, self.__current_user.admin)
-        if download_file:
+        record, file_outdated = self._identify(record_type, self._get_metadata(url))
+        if download_file and (getattr(record, 'local_filename', None) is None or file_outdated):
             return self.download_file(record)
         return record
 
-    def get_all(self, record_type):
-        # type: (AnyRecordType) -> List[AnyRecord]
+    def _identify(self, record_type, data):
+        # type: (AnyRecordType, Dict[str, Any]) -> Tuple[AnyRecord, bool]
+        """
+        Make a record from the data received from the service, or update the record in the identity map with it.
+        Records with unsaved changes are left as they are.
+        :param record_type:
+        :param data:
+        :return: The record, and whether its downloaded file is older than the file on the service.
+        """
+        if self.__identity_map is not None:
+            record = self.__identity_map.get(record_type, data.get('id'))
+            if record is not None:
+                if getattr(record, 'changed_fields', None):
+                    return record, False
+                file_outdated = isinstance(record, FileRecord) and record.local_filename is not None \
+                    and data.get('updated_on') != record.updated_on.strftime('%Y-%m-%dT%H:%M:%S') \
+                    and not record.file_changed()
+                record.update(data, self.__base_url)
+                return record, file_outdated
+        record = record_type(data, self.__base_url, self.__current_user.admin)
+        record._session = self
+        if self.__identity_map is not None:
+            self.__identity_map.add(record)
+        return record, False
+
+    @staticmethod
+    def _group(records):
+        # type: (List[Record]) -> List[Record]
+        """
+        Mark records as retrieved together, so that their linked records are looked up together.
+        :param records:
+        :return: The records.
+        """
+        cohort = weakref.WeakSet(records)
+        for record in records:
+            record._cohort = cohort
+        return records
+
+    def prefetch(self, records, *relationships):
+        # type: (Iterable[Record], str) -> None
+        """
+        Look up the linked records of many records at once, with one concurrent fetch per relationship, so that
+        accessing them afterwards (ex: sample.sample_groups) makes no requests. Records whose links could not be looked
+        up try again (and raise) when they are accessed.
+        :param records:
+        :param relationships: The names of the accessors (ex: 'sample_groups', 'owner').
+        :return:
+        """
+        records = list(records)
+        for name in relationships:
+            self._resolve_relationship([record for record in records if record._related_if_current(name) is None],
+                                       name)
+
+    def _resolve_relationship(self, records, name, max_workers=8):
+        # type: (List[Record], str, int) -> Dict[int, Exception]
+        """
+        Look up the records linked to records through the relationship name, and remember them on each record.
+        :param records:
+        :param name:
+        :param max_workers: The maximum number of simultaneous requests.
+        :return: The first error of each record whose links could not all be looked up, by id() of the record.
+        """
+        links = []
+        wanted = OrderedDict()  # type: Dict[Type[Record], Dict[Any, None]]
+        for record in records:
+            if name not in type(record)._relationships:
+                raise ValueError('{} has no relationship {}.'.format(type(record).__name__, name))
+            type_name, field = type(record)._relationships[name]
+            record_type = record_type_named(type_name)
+            ids = getattr(record, field)
+            id_list = ids if isinstance(ids, list) else [ids] if ids is not None else []
+            wanted.setdefault(record_type, OrderedDict()).update((record_id, None) for record_id in id_list)
+            links.append((record, record_type, ids, id_list))
+        results = {}
+        for record_type, ids in wanted.items():
+            if ids:
+                for result in self.get_many(record_type, list(ids), max_workers):
+                    results[(record_type, result.key)] = result
+        errors = {}
+        for record, record_type, ids, id_list in links:
+            failed = [results[(record_type, record_id)].error for record_id in id_list
+                      if not results[(record_type, record_id)].succeeded]
+            if failed:
+                errors[id(record)] = failed[0]
+                continue
+            related = [results[(record_type, record_id)].value for record_id in id_list]
+            record._set_related(name, ids, related if isinstance(ids, list) else related[0] if related else None)
+        return errors
+
+    def get_many(self, record_type, record_ids, max_workers=8, download_file=False):
+        # type: (AnyRecordType, Iterable[Union[str, int]], int, bool) -> BatchReport
+        """
+        Get many records of one type concurrently. Each distinct id is only requested once. A missing or forbidden id
+        does not stop the others.
+        :param record_type: The type of the records (i.e. Sample, Collection, Analysis)
+        :param record_ids: The ids of the records.
+        :param max_workers: The maximum number of simultaneous requests.
+        :param download_file: Whether to also download the files of the records (FileRecord types only).
+        :return: A report with one result per id in the order given. The value of a result is the record, the error is
+                 the exception raised while getting the record or downloading its file.
+        """
+        if download_file and not issubclass(record_type, FileRecord):
+            raise ValueError('{} records have no file to download.'.format(record_type.__name__))
+        record_ids = list(record_ids)
+        unique_ids = list(OrderedDict.fromkeys(record_ids))
+        report = self._run_batch(lambda record_id: (self.get(record_type, record_id), 0), unique_ids, max_workers)
+        self._group([result.value for result in report.succeeded])
+        results = {result.key: result for result in report}
+        if download_file:
+            fetched = [result for result in report if result.succeeded]
+            downloads = self.download_files([result.value for result in fetched], max_workers)
+            for result, download in zip(fetched, downloads):
+                results[result.key] = BatchResult(result.key, result.value, download.error, download.size,
+                                                  result.elapsed + download.elapsed)
+            return BatchReport([results[record_id] for record_id in record_ids], report.elapsed + downloads.elapsed)
+        return BatchReport([results[record_id] for record_id in record_ids], report.elapsed)
+
+    def fetch_analysis_bundle(self, analysis, download=True, max_workers=8, chunk_size=None, download_workflows=True):
+        # type: (Union[Analysis, int], bool, int, Union[int, None], bool) -> AnalysisBundle
+        """
+        Get the collections, workflows and external files linked to an analysis concurrently, instead of one after
+        another. Each file is downloaded by the same worker right after its record arrives, so downloads overlap with
+        the remaining requests. A record which cannot be fetched does not stop the others.
+        :param analysis: An analysis or the id of one.
+        :param download: Whether to download the files of the linked records.
+        :param max_workers: The maximum number of simultaneous requests.
+        :param chunk_size: The number of bytes written at a time. Defaults to the download_chunk_size of the session.
+        :param download_workflows: Whether the files of the workflows are downloaded too, when download is True.
+        :return:
+        """
+        if not isinstance(analysis, Analysis):
+            analysis = self.get(Analysis, analysis)
+        chunk_size = chunk_size or self.__download_chunk_size
+        links = [(Collection, record_id) for record_id in analysis.collection_ids] \
+            + [(Workflow, record_id) for record_id in analysis.workflow_ids] \
+            + [(ExternalFile, record_id) for record_id in analysis.external_file_ids]
+
+        def fetch(link):
+            record = self.get(*link)
+            size = 0
+            if download and isinstance(record, FileRecord) and record.local_filename is None \
+                    and (download_workflows or not isinstance(record, Workflow)):
+                size = self._stream_download(record, chunk_size)
+                self._note_download(record)
+            return record, size
+
+        report = self._run_batch(fetch, list(OrderedDict.fromkeys(links)), max_workers)
+        records = {result.key: result.value for result in report.succeeded}
+        return AnalysisBundle(analysis,
+                              [records[link] for link in links if link[0] is Collection and link in records],
+                              [records[link] for link in links if link[0] is Workflow and link in records],
+                              [records[link] for link in links if link[0] is ExternalFile and link in records],
+                              report)
+
+    def get_all(self, record_type, lite=False):
+        # type: (AnyRecordType, bool) -> List[Union[AnyRecord, LiteRecord]]
         """
         Get all the records of a particular type.
         :param record_type:
+        :param lite: Whether to return read-only LiteRecords (ex: LiteSample), which keep the JSON of each record and
+                     parse fields on first access. They take much less memory and time to make than records.
         :return:
         """
         url = '{}/{}'.format(self.__base_url, record_type.url_suffix)
-        res = requests.get(url, headers=self.get_auth_header())
         try:
-            res.raise_for_status()
+            entries = self._get_metadata(url)
         except requests.HTTPError as e:
             print('Response:')
-            print(e.response.json())
-        return [record_type(entry, self.__base_url, self.__current_user.admin) for entry in res.json()]
+            print(e.response.text)
+            raise e
+        if lite:
+            lite_type = lite_record_type(record_type)
+            return [lite_type(entry, self.__base_url) for entry in entries]
+        return self._group([self._identify(record_type, entry)[0] for entry in entries])
+
+    def get_all_frame(self, record_type, columns=None):
+        # type: (AnyRecordType, Union[Iterable[str], None]) -> pd.DataFrame
+        """
+        Get all the records of a particular type as a DataFrame with one row per record, indexed by id, without making
+        record objects. This is much faster than get_all for listing and filtering many records. created_on and
+        updated_on are datetime64 columns and linked records are lists of ids (ex: sample_ids for sample groups), in
+        Arrow list columns if pyarrow is installed and as tuples otherwise. Turn the rows you need into records with
+        records_from_frame.
+        :param record_type:
+        :param columns: The columns to include (ex: ['name', 'owner_id', 'created_on']). None for all.
+        :return:
+        """
+        url = '{}/{}'.format(self.__base_url, record_type.url_suffix)
+        try:
+            entries = self._get_metadata(url)
+        except requests.HTTPError as e:
+            print('Response:')
+            print(e.response.text)
+            raise e
+        return entries_to_frame(entries, columns)
+
+    def records_from_frame(self, record_type, frame):
+        # type: (AnyRecordType, pd.DataFrame) -> List[AnyRecord]
+        """
+        Make records from rows of a DataFrame returned by get_all_frame, without any requests. The DataFrame needs every
+        column the records are made from (see frames.required_columns). Get the records of a DataFrame with fewer
+        columns with get_many(record_type, frame.index).
+        :param record_type:
+        :param frame: Rows of a DataFrame returned by get_all_frame for this record type.
+        :return: The records, in the order of the rows.
+        """
+        missing = [column for column in required_columns(record_type) if column not in frame.columns]
+        if missing:
+            raise ValueError('{} records cannot be made without the columns {}.'.format(record_type.__name__,
+                                                                                       ', '.join(missing)))
+        return self._group([self._identify(record_type, entry)[0] for entry in frame_to_entries(frame)])
+
+    def records_from_lite(self, records):
+        # type: (Iterable[LiteRecord]) -> List[AnyRecord]
+        """
+        Make full records from lite records, without any requests.
+        :param records:
+        :return: The records, in the same order.
+        """
+        return self._group([self._identify(record.record_type, dict(record.raw))[0] for record in records])
+
+    def iter_all(self, record_type, page_size=None, filters=None, chunk_size=65536, lite=False):
+        # type: (AnyRecordType, Union[int, None], Dict[str, Any], int, bool) -> Iterator[Union[AnyRecord, LiteRecord]]
+        """
+        Iterate over all the records of a particular type as they arrive. The response is decoded incrementally, so the
+        first records are available before the whole list is transferred and the list is never held in memory at once.
+        The metadata cache is not used.
+        :param record_type:
+        :param page_size: If set, request the records in pages of this size using the "page" and "page_size" query
+                          parameters. If the service does not paginate, all records are still yielded exactly once.
+        :param filters: Query parameters sent with the request (e.g. {'owner_id': 3}), for services which support them.
+        :param chunk_size: The number of bytes read from the network at a time.
+        :param lite: Whether to yield read-only LiteRecords instead of records, see get_all.
+        :return:
+        """
+        url = '{}/{}'.format(self.__base_url, record_type.url_suffix)
+        lite_type = lite_record_type(record_type) if lite else None
+        params = dict(filters or {})
+        page = 1
+        first_id_of_previous_page = None
+        while True:
+            if page_size is not None:
+                params.update({'page': page, 'page_size': page_size})
+            res = self._request('GET', url, params=params, stream=True)
+            try:
+                try:
+                    res.raise_for_status()
+                except requests.HTTPError as e:
+                    print('Response:')
+                    print(e.response.text)
+                    raise e
+                count = 0
+                for entry in iter_json_array(res.iter_content(chunk_size)):
+                    if count == 0 and page > 1 and entry.get('id') == first_id_of_previous_page:
+                        return  # the service ignored the page parameter and sent the first page again
+                    if count == 0:
+                        first_id_of_previous_page = entry.get('id')
+                    count += 1
+                    yield lite_type(entry, self.__base_url) if lite else self._identify(record_type, entry)[0]
+            finally:
+                res.close()
+            if page_size is None or count != page_size:
+                return  # a short page is the last one, a long page means the service sent everything
+            page += 1
+
+    def _get_metadata(self, url):
+        # type: (str) -> Any
+        """
+        Get and decode a JSON resource, using the metadata cache if there is one. Jobs are never cached, since their
+        status changes without anyone editing them.
+        :param url:
+        :return:
+        """
+        cache = self.__metadata_cache
+        jobs_url = '{}/{}'.format(self.__base_url, Job.url_suffix)
+        if cache is None or url == jobs_url or url.startswith(jobs_url + '/'):
+            res = self._request('GET', url)
+            res.raise_for_status()
+            return self._decode(res)
+        entry = cache.lookup(url)
+        if entry is not None and cache.is_fresh(entry):
+            cache.record_hit()
+            return self.__json_codec.loads(entry.content)
+        res = self._request('GET', url, headers=entry.validators if entry is not None else None)
+        if res.status_code == 304 and entry is not None:
+            cache.record_hit(revalidated=True)
+            return self.__json_codec.loads(entry.content)
+        res.raise_for_status()
+        cache.store(url, res)
+        return self._decode(res)
+
+    def _invalidate_metadata(self, record):
+        # type: (Record) -> None
+        """
+        Remove the cached records of the type of a record which was written, and of the types which list it.
+        :param record:
+        :return:
+        """
+        if self.__metadata_cache is not None:
+            url_suffix = type(record).url_suffix
+            for suffix in (url_suffix,) + _RELATED_URL_SUFFIXES.get(url_suffix, ()):
+                self.__metadata_cache.invalidate('{}/{}'.format(self.__base_url, suffix))
 
     def delete(self, record):
         # type: (Record) -> Dict[str, str]
@@ -135,80 +959,172 @@ class Session:
         :return:
         """
         if record.valid:
-            res = requests.delete(record.update_url, headers=self.get_auth_header())
+            res = self._request('DELETE', record.update_url)
             try:
                 res.raise_for_status()
             except requests.HTTPError as e:
                 print('Response: ')
-                print(e.response.json())
+                print(e.response.text)
                 raise e
+            if self.__download_cache is not None and isinstance(record, FileRecord):
+                self.__download_cache.invalidate(record)
+            self._invalidate_metadata(record)
+            if self.__identity_map is not None:
+                self.__identity_map.invalidate(type(record), record.id)
             record.invalidate()
-            return res.json()
+            return self._decode(res)
         else:
             raise ValueError('Record is not valid.')
 
-    def update(self, record, upload_file=None):
-        # type: (Record, bool) -> Record
+    def _upload(self, url, fields, filename, progress_callback=None):
+        # type: (str, Union[Dict[str, Any], None], str, Union[Callable[[int, int], None], None]) -> Tuple[requests.Response, str]
+        """
+        Post a file (and form fields) as multipart/form-data, streaming the file from disk.
+        :param url:
+        :param fields:
+        :param filename:
+        :param progress_callback: Called with the number of bytes sent so far and the total size of the body.
+        :return: The response and the SHA-256 hex digest of the file that was sent.
+        """
+        with MultipartFileEncoder(fields, 'file', filename, self.__upload_chunk_size, progress_callback) as body:
+            res = self._request('POST', url, data=body, headers={'Content-Type': body.content_type})
+            return res, body.file_digest
+
+    def update(self, record, upload_file=None, progress_callback=None, changed_only=True):
+        # type: (Record, bool, Union[Callable[[int, int], None], None], bool) -> Record
         """
         Update the server with the values of the record
         :param record: The record to update on the server
-        :param upload_file: Only applies when record is FileRecord. Default behavior will be as if it is true if the file is downloaded.
+        :param upload_file: Only applies when record is FileRecord. Default behavior will be as if it is true if the
+                            file is downloaded and changed since it was downloaded (or if it is downloaded, when
+                            changed_only is False).
+        :param progress_callback: Called with the number of bytes sent so far and the total size while uploading the
+                                  file.
+        :param changed_only: Only send the fields which were set or changed in place since the record was retrieved. If
+                             nothing was changed and the file is not uploaded, no request is made.
         :return:
         """
         if record.valid:
             if upload_file is None:
-                upload_file = isinstance(record, FileRecord) and record.local_filename is not None
+                upload_file = isinstance(record, FileRecord) and record.local_filename is not None \
+                              and (not changed_only or record.file_changed())
+            if changed_only and isinstance(record, OmicsRecord) and 'id' not in record.changed_fields:
+                payload = record.serialize_changes()
+                if not upload_file and not record.changed_fields:
+                    return record
+            else:
+                payload = record.serialize()
             if isinstance(record, FileRecord) and record.local_filename is not None and upload_file:
                 # We make two requests because multipart/form-data doesn't handle arrays very well
-                upload_res = requests.post(record.update_url,
-                                           headers=self.get_auth_header(),
-                                           files={'file': open(record.local_filename, 'rb')})
+                upload_res, digest = self._upload(record.update_url, None, record.local_filename, progress_callback)
                 try:
                     upload_res.raise_for_status()
                 except requests.HTTPError as e:
                     print('Response: ')
-                    print(e.response.json())
+                    print(e.response.text)
                     raise e
-            res = requests.post(record.update_url, headers=self.get_auth_header(), json=record.serialize())
+                record.snapshot_file(digest)
+            res = self._request('POST', record.update_url, json=payload)
             try:
                 res.raise_for_status()
             except requests.HTTPError as e:
                 print('Response: ')
-                print(e.response.json())
+                print(e.response.text)
                 raise e
-            record.update(res.json(), self.__base_url)
+            self._invalidate_metadata(record)
+            data = self._decode(res)
+            record.update(data, self.__base_url)
+            self._remember(record, data)
             return record
         else:
             raise ValueError('Record is not valid.')
 
-    def create(self, record):
-        # type: (Record) -> Record
+    def _remember(self, record, data):
+        # type: (Record, Dict[str, Any]) -> None
+        """
+        Attach a record which was created or updated to this session and put it in the identity map. If another object
+        is kept for the same record, it is updated in place instead (unless it has unsaved changes).
+        :param record:
+        :param data: The state of the record returned by the service.
+        :return:
+        """
+        if record._session is None:
+            record._session = self
+        if self.__identity_map is None:
+            return
+        kept = self.__identity_map.get(type(record), record.id)
+        if kept is None or kept is record:
+            self.__identity_map.add(record)
+        elif not getattr(kept, 'changed_fields', None):
+            kept.update(data, self.__base_url)
+
+    def create(self, record, progress_callback=None):
+        # type: (Record, Union[Callable[[int, int], None], None]) -> Record
         """
         Create a new record. Record object will be populated with new id
         :param record: A record
+        :param progress_callback: Called with the number of bytes sent so far and the total size while uploading the
+                                  file of a FileRecord.
         :return:
         """
         if record.valid:
             if isinstance(record, FileRecord) and record.local_filename is not None:
-                res = requests.post(record.upload_url,
-                                    headers=self.get_auth_header(),
-                                    data=record.serialize(),
-                                    files={'file': open(record.local_filename, 'rb')})
+                res, digest = self._upload(record.upload_url, record.serialize(), record.local_filename,
+                                           progress_callback)
+                if res.ok:
+                    record.snapshot_file(digest)
             else:
-                res = requests.post(record.create_url,
-                                    headers=self.get_auth_header(),
+                res = self._request('POST', record.create_url,
                                     data=record.serialize())
             try:
                 res.raise_for_status()
             except requests.HTTPError as e:
                 print('Response: ')
-                print(e.response.json())
+                print(e.response.text)
                 raise e
-            record.update(res.json(), self.__base_url)
+            self._invalidate_metadata(record)
+            data = self._decode(res)
+            record.update(data, self.__base_url)
+            self._remember(record, data)
             return record
         else:
             raise ValueError('Record is not valid.')
 
+    def create_many(self, records, max_workers=4):
+        # type: (Iterable[Record], int) -> BatchReport
+        """
+        Create many records concurrently. Each record that was created is populated with its new id, the others are
+        left unchanged. A failure does not stop the others.
+        :param records:
+        :param max_workers: The maximum number of simultaneous requests.
+        :return: A report with one result per record in the order given.
+        """
+        return self._run_batch(lambda record: (self.create(record), 0), records, max_workers)
+
+    def update_many(self, records, upload_file=None, max_workers=4):
+        # type: (Iterable[Record], bool, int) -> BatchReport
+        """
+        Update many records on the server concurrently. Each record that was updated takes the values returned by the
+        server, the others are left unchanged. A failure does not stop the others.
+        :param records:
+        :param upload_file: As in update.
+        :param max_workers: The maximum number of simultaneous requests.
+        :return: A report with one result per record in the order given.
+        """
+        return self._run_batch(lambda record: (self.update(record, upload_file), 0), records, max_workers)
+
+    def delete_many(self, records, max_workers=4):
+        # type: (Iterable[Record], int) -> BatchReport
+        """
+        Delete many records concurrently. Each record that was deleted is set to invalid, the others stay valid. A
+        failure does not stop the others.
+        :param records:
+        :param max_workers: The maximum number of simultaneous requests.
+        :return: A report with one result per record in the order given. The value of a result is the response of the
+                 server.
+        """
+        return self._run_batch(lambda record: (self.delete(record), 0), records, max_workers)
+
     def submit_job(self, workflow, job_params):
         # type: (Union[Workflow, Dict[str, Any]], Dict[str, Any]) -> Job
         """
@@ -222,14 +1138,215 @@ class Session:
             'job': job_params,
             'workflow': workflow.serialize() if isinstance(workflow, Workflow) else workflow
         }
-        res = requests.post(submit_url, headers=self.get_auth_header(), json=data)
+        res = self._request('POST', submit_url, json=data)
         try:
             res.raise_for_status()
         except requests.HTTPError as e:
             print('Response: ')
-            print(e.response.json())
+            print(e.response.text)
             raise e
-        return Job(res.json(), self.__base_url)
+        return Job(self._decode(res), self.__base_url)
+
+    def submit_jobs(self, workflow, job_params, max_in_flight=8, submit_retries=2, cancel_on_failure=False,
+                    timeout=None, poll_interval=1.0, max_poll_interval=30.0, backoff=1.5, batch_threshold=4):
+        # type: (Union[Workflow, Dict[str, Any]], Iterable[Dict[str, Any]], int, int, bool, Union[float, None], float, float, float, int) -> JobReport
+        """
+        Run one workflow once for each set of job parameters, keeping at most max_in_flight jobs on the job server at a
+        time. A new job is submitted as soon as a slot is free. The jobs are polled as in wait_for_jobs.
+        :param workflow: Either a workflow or the workflow definition as dictionary.
+        :param job_params: Values needed by the workflow to run, one dictionary per job.
+        :param max_in_flight: The maximum number of submitted jobs which have not finished yet.
+        :param submit_retries: How many times a submission which failed with a connection error or a server error is
+                               tried again.
+        :param cancel_on_failure: Whether to cancel the running jobs and submit no more when a job fails.
+        :param timeout: The longest time to wait for all the jobs in seconds. None to wait indefinitely. Jobs which have
+                        not finished by then are reported as failed (and cancelled if cancel_on_failure is set).
+        :param poll_interval: The first wait between two status checks in seconds.
+        :param max_poll_interval: The longest wait between two status checks in seconds.
+        :param backoff: The factor the wait grows by when no job finished.
+        :param batch_threshold: When at least this many jobs are running, their status is checked with one request to
+                                the job list instead of one request per job.
+        :return: One result per set of job parameters, with the finished job as value.
+        """
+        if max_in_flight < 1:
+            raise ValueError('max_in_flight must be at least 1.')
+        workflow = workflow.serialize() if isinstance(workflow, Workflow) else workflow
+        job_params = list(job_params)
+        results = [None] * len(job_params)  # type: List[Union[BatchResult, None]]
+        queued = deque(range(len(job_params)))
+        running = OrderedDict()  # type: Dict[str, Job]
+        submitted = {}  # type: Dict[str, Tuple[int, float]]
+        start = time.time()
+        deadline = start + timeout if timeout is not None else None
+        interval = poll_interval
+        stop_reason = None
+
+        def finish(job, error=None):
+            position, submitted_on = submitted[job.id]
+            results[position] = BatchResult(job_params[position], job, error, elapsed=time.time() - submitted_on)
+
+        while queued or running:
+            slots = [queued.popleft() for _ in range(min(max_in_flight - len(running), len(queued)))]
+            report = self._run_batch(lambda position: (self._submit_job_retrying(workflow, job_params[position],
+                                                                                 submit_retries), 0),
+                                     slots, len(slots))
+            for position, result in zip(slots, report):
+                if result.succeeded:
+                    running[result.value.id] = result.value
+                    submitted[result.value.id] = (position, time.time())
+                else:
+                    results[position] = BatchResult(job_params[position], error=result.error, elapsed=result.elapsed)
+                    if cancel_on_failure:
+                        stop_reason = 'another job failed'
+            finished = []
+            if running:
+                finished = [job for job in self._poll_jobs(running, batch_threshold) if job.finished]
+            for job in finished:
+                del running[job.id]
+                if job.status == 'Succeeded':
+                    finish(job)
+                else:
+                    finish(job, RuntimeError('Job {} {}.'.format(job.id, job.status.lower())))
+                    if cancel_on_failure:
+                        stop_reason = 'another job failed'
+            if deadline is not None and stop_reason is None and time.time() >= deadline:
+                stop_reason = 'the time ran out'
+            if stop_reason is not None:
+                break
+            if not running:
+                continue
+            interval = poll_interval if finished or slots else min(interval * backoff, max_poll_interval)
+            if deadline is not None:
+                interval = max(0.0, min(interval, deadline - time.time()))
+            time.sleep(interval)
+
+        for job in running.values():
+            if cancel_on_failure:
+                try:
+                    self.cancel_job(job)
+                except Exception as e:
+                    finish(job, e)
+                    continue
+                finish(job, RuntimeError('Job {} cancelled because {}.'.format(job.id, stop_reason)))
+            else:
+                finish(job, RuntimeError('Job {} had not finished when {}.'.format(job.id, stop_reason)))
+        for position in queued:
+            results[position] = BatchResult(job_params[position],
+                                            error=RuntimeError('Not submitted because {}.'.format(stop_reason)))
+        return JobReport(results, time.time() - start)
+
+    def _submit_job_retrying(self, workflow, job_params, retries):
+        # type: (Dict[str, Any], Dict[str, Any], int) -> Job
+        """
+        Submit a job, trying again after connection errors and server errors.
+        :param workflow: The workflow definition.
+        :param job_params:
+        :param retries: The maximum number of times the submission is tried again.
+        :return:
+        """
+        submit_url = '{}/{}'.format(self.__base_url, Job.url_suffix)
+        data = {'job': job_params, 'workflow': workflow}
+        attempt = 0
+        while True:
+            try:
+                res = self._request('POST', submit_url, json=data)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= retries:
+                    raise
+                res = None
+            else:
+                # decided on the status alone, since the body of a server error is not always JSON
+                if res.status_code < 500 and res.status_code != 429:
+                    res.raise_for_status()
+                    return Job(self._decode(res), self.__base_url)
+                if attempt >= retries:
+                    res.raise_for_status()
+                res.close()
+            delay = self.__retry_policy.backoff(attempt, res)
+            self._count_retry(delay=delay)
+            time.sleep(delay)
+            attempt += 1
+
+    def wait_for_job(self, job, timeout=None, poll_interval=1.0, max_poll_interval=30.0):
+        # type: (Job, Union[float, None], float, float) -> Job
+        """
+        Wait until a job has finished.
+        :param job:
+        :param timeout: The longest time to wait in seconds. None to wait indefinitely.
+        :param poll_interval: The first wait between two status checks in seconds.
+        :param max_poll_interval: The longest wait between two status checks in seconds.
+        :return: The finished job.
+        """
+        return next(self.wait_for_jobs([job], timeout, poll_interval, max_poll_interval))
+
+    def wait_for_jobs(self, jobs, timeout=None, poll_interval=1.0, max_poll_interval=30.0, backoff=1.5,
+                      batch_threshold=4):
+        # type: (Iterable[Job], Union[float, None], float, float, float, int) -> Iterator[Job]
+        """
+        Wait for jobs to finish, yielding each job as soon as it has finished (in the order they finish). The wait
+        between status checks starts at poll_interval, grows by a factor of backoff whenever no job finished, and goes
+        back to poll_interval when one does. The metadata cache is not used.
+        :param jobs:
+        :param timeout: The longest time to wait for all the jobs in seconds. None to wait indefinitely. A RuntimeError
+                        is raised when it runs out.
+        :param poll_interval: The first wait between two status checks in seconds.
+        :param max_poll_interval: The longest wait between two status checks in seconds.
+        :param backoff: The factor the wait grows by when no job finished.
+        :param batch_threshold: When at least this many jobs are unfinished, the status of all of them is checked with
+                                one request to the job list instead of one request per job.
+        :return: The finished jobs, updated with their final state.
+        """
+        pending = OrderedDict((job.id, job) for job in jobs)
+        deadline = time.time() + timeout if timeout is not None else None
+        interval = poll_interval
+        while pending:
+            finished = [job for job in self._poll_jobs(pending, batch_threshold) if job.finished]
+            for job in finished:
+                del pending[job.id]
+                yield job
+            if not pending:
+                return
+            interval = poll_interval if finished else min(interval * backoff, max_poll_interval)
+            if deadline is not None:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise RuntimeError('Timed out waiting for jobs {}.'.format(', '.join(str(job_id)
+                                                                                         for job_id in pending)))
+                interval = min(interval, remaining)
+            time.sleep(interval)
+
+    def _poll_jobs(self, jobs, batch_threshold):
+        # type: (Dict[str, Job], int) -> List[Job]
+        """
+        Update jobs with their current state on the job server.
+        :param jobs: The jobs to update by id.
+        :param batch_threshold: The number of jobs from which the job list is requested instead of each job.
+        :return: The updated jobs.
+        """
+        url = '{}/{}'.format(self.__base_url, Job.url_suffix)
+        if len(jobs) >= batch_threshold:
+            res = self._request('GET', url)
+            res.raise_for_status()
+            states = [state for state in self._decode(res) if state['id'] in jobs]
+            # jobs which are not in the list (ex: removed from it once finished) are requested one by one
+            listed = set(state['id'] for state in states)
+            missing = [job_id for job_id in jobs if job_id not in listed]
+        else:
+            states = []
+            missing = list(jobs)
+        if missing:
+            report = self._run_batch(lambda job_id: (self._get_job_state(url, job_id), 0), missing, len(missing))
+            report.raise_for_errors()
+            states += report.values
+        for state in states:
+            jobs[state['id']].update(state, self.__base_url)
+        return [jobs[state['id']] for state in states]
+
+    def _get_job_state(self, url, job_id):
+        # type: (str, str) -> Dict[str, Any]
+        res = self._request('GET', '{}/{}'.format(url, job_id))
+        res.raise_for_status()
+        return self._decode(res)
 
     def cancel_job(self, job):
         # type: (Job) -> Dict[str, Any]
@@ -239,11 +1356,11 @@ class Session:
         :return:
         """
         url = '{}/{}/{}?method=cancel'.format(self.__base_url, Job.url_suffix, job.id)
-        res = requests.post(url, headers=self.get_auth_header(), json={})
+        res = self._request('POST', url, json={})
         try:
             res.raise_for_status()
         except requests.HTTPError as e:
             print('Response: ')
-            print(e.response.json())
+            print(e.response.text)
             raise e
-        return res.json()
+        return self._decode(res)
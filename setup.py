@@ -17,11 +17,17 @@ setuptools.setup(
     install_requires=[
         'requests>=2.10.0',
         'h5py>=2.6.0',
-        'pandas>=0.18.0',
+        'pandas>=1.0.0',
         'numpy>=1.11.0',
         'scipy>=0.18.0',
-        'typing>=3.5.0'
+        'typing>=3.5.0',
+        'futures>=3.0.0; python_version < "3.2"'
     ],
+    extras_require={
+        'async': ['aiohttp>=3.0.0'],
+        'fast': ['orjson>=3.0.0; python_version >= "3.6"'],
+        'frames': ['pyarrow>=7.0.0; python_version >= "3.7"']
+    },
     classifiers=[
         "Natural Language :: English",
         "Intended Audience :: Science/Research",